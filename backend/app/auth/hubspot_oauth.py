@@ -4,10 +4,17 @@ Handles authorization code flow for HubSpot API access.
 """
 import os
 import time
+import asyncio
 import secrets
+import functools
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Tuple, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from urllib.parse import urlencode, quote_plus
 import httpx
+import orjson
+
+from ..core.cache import SingleFlight
 
 # HubSpot OAuth Configuration
 HUBSPOT_CLIENT_ID = os.getenv("HUBSPOT_CLIENT_ID", "")
@@ -19,6 +26,19 @@ HUBSPOT_AUTH_URL = "https://app.hubspot.com/oauth/authorize"
 HUBSPOT_TOKEN_URL = "https://api.hubapi.com/oauth/v1/token"
 HUBSPOT_INFO_URL = "https://api.hubapi.com/oauth/v1/access-tokens"
 
+# Parsed once so httpx doesn't re-parse the endpoint on every token request
+_TOKEN_URL = httpx.URL(HUBSPOT_TOKEN_URL)
+
+# Token requests are sent as pre-encoded form bodies
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+# Pending authorization requests expire after 10 minutes
+STATE_TTL_SECONDS = 600
+MAX_PENDING_STATES = 4096
+
+# Least-recently-used sessions are evicted beyond this many stored tokens
+MAX_TOKENS = 100_000
+
 # Default scopes for insurance broker functionality
 DEFAULT_SCOPES = [
     "crm.objects.contacts.read",
@@ -34,7 +54,26 @@ DEFAULT_SCOPES = [
 ]
 
 
-@dataclass
+@functools.lru_cache(maxsize=32)
+def _build_static_params(scopes_tuple: Tuple[str, ...], client_id: str, redirect_uri: str) -> str:
+    """Pre-encode the authorization URL parameters that don't vary per request."""
+    return urlencode({
+        "client_id": client_id,
+        "redirect_uri": redirect_uri,
+        "scope": " ".join(scopes_tuple),
+    })
+
+
+def _error_payload(response: httpx.Response) -> Dict[str, Any]:
+    """Decode an error response body, falling back to the raw text if it isn't a JSON object."""
+    try:
+        data = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return {"error": response.text}
+    return data if isinstance(data, dict) else {"error": response.text}
+
+
+@dataclass(slots=True)
 class HubSpotTokenInfo:
     """Represents HubSpot OAuth tokens."""
     access_token: str
@@ -45,18 +84,22 @@ class HubSpotTokenInfo:
     hub_id: Optional[int] = None
     hub_domain: Optional[str] = None
     user: Optional[str] = None
-    scopes: List[str] = None
+    scopes: List[str] = field(default_factory=list)
+    _refresh_at: float = field(default=0.0, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.acquired_at == 0.0:
             self.acquired_at = time.time()
-        if self.scopes is None:
-            self.scopes = []
+        # acquired_at/expires_at stay wall-clock for to_dict(); the refresh deadline
+        # is tracked on the monotonic clock so clock jumps can't skew it.
+        # Refresh 5 minutes before actual expiry
+        remaining = self.acquired_at + self.expires_in - time.time()
+        self._refresh_at = time.monotonic() + remaining - 300
     
     @property
     def is_expired(self) -> bool:
         """Check if access token is expired (with 5 min buffer)."""
-        return time.time() >= (self.acquired_at + self.expires_in - 300)
+        return time.monotonic() >= self._refresh_at
     
     @property
     def expires_at(self) -> float:
@@ -107,11 +150,50 @@ class HubSpotOAuthClient:
         self.redirect_uri = redirect_uri or HUBSPOT_REDIRECT_URI
         self.scopes = scopes or DEFAULT_SCOPES
         
-        # In-memory state store for CSRF protection
-        self._pending_states: Dict[str, float] = {}
+        # Invariant form-body prefixes; only code/refresh_token are appended per request
+        self._exchange_prefix = urlencode({
+            "grant_type": "authorization_code",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "redirect_uri": self.redirect_uri,
+        }).encode("ascii")
+        self._refresh_prefix = urlencode({
+            "grant_type": "refresh_token",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+        }).encode("ascii")
+        
+        # In-memory state store for CSRF protection (insertion-ordered for eviction)
+        self._pending_states: "OrderedDict[str, float]" = OrderedDict()
         
-        # In-memory token store
-        self._tokens: Dict[str, HubSpotTokenInfo] = {}
+        # In-memory token store (LRU-ordered, capped at MAX_TOKENS)
+        self._tokens: "OrderedDict[str, HubSpotTokenInfo]" = OrderedDict()
+        
+        # Shared HTTP client (lazily created, pooled across OAuth calls)
+        self._http: Optional[httpx.AsyncClient] = None
+        
+        # In-flight refreshes keyed by user_id; concurrent callers share one refresh
+        self._inflight_refreshes = SingleFlight()
+        
+        # Hub metadata (hub_id, hub_domain, user, scopes) keyed by refresh_token;
+        # it doesn't change across refreshes, so refreshes can skip get_token_info
+        self._hub_meta_cache: Dict[str, Dict[str, Any]] = {}
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get or create the shared HTTP client."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                http2=True,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+            )
+        return self._http
+    
+    async def close(self):
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
     def _validate_config(self):
         """Validate OAuth configuration."""
@@ -120,6 +202,18 @@ class HubSpotOAuthClient:
         if not self.client_secret:
             raise HubSpotOAuthError("configuration_error", "HUBSPOT_CLIENT_SECRET not configured")
     
+    def _evict(self, max_size: int = MAX_PENDING_STATES, ttl: int = STATE_TTL_SECONDS):
+        """Drop expired pending states, then the oldest ones beyond max_size."""
+        now = time.monotonic()
+        while self._pending_states:
+            oldest_time = next(iter(self._pending_states.values()))
+            if now - oldest_time <= ttl:
+                break
+            self._pending_states.popitem(last=False)
+        
+        while len(self._pending_states) > max_size:
+            self._pending_states.popitem(last=False)
+    
     def generate_authorization_url(
         self,
         state: str = None,
@@ -140,34 +234,33 @@ class HubSpotOAuthClient:
         self._validate_config()
         
         if not state:
-            state = secrets.token_urlsafe(32)
+            state = secrets.token_urlsafe(16)  # 128 bits of CSRF entropy
         
-        # Store state with timestamp for validation
-        self._pending_states[state] = time.time()
+        # Store state with timestamp for validation (monotonic; only used for TTL checks)
+        self._pending_states[state] = time.monotonic()
+        self._pending_states.move_to_end(state)
+        self._evict()
         
-        # Build authorization URL
+        # Build authorization URL (static parameters are encoded once per scope set)
         scope_list = scopes or self.scopes
-        
-        from urllib.parse import urlencode
+        static_params = _build_static_params(tuple(scope_list), self.client_id, self.redirect_uri)
         
         params = {
-            "client_id": self.client_id,
-            "redirect_uri": self.redirect_uri,
-            "scope": " ".join(scope_list),
             "state": state
         }
         
         if optional_scopes:
             params["optional_scope"] = " ".join(optional_scopes)
         
-        auth_url = f"{HUBSPOT_AUTH_URL}?{urlencode(params)}"
+        auth_url = f"{HUBSPOT_AUTH_URL}?{static_params}&{urlencode(params)}"
         
         return auth_url, state
     
     async def exchange_code_for_tokens(
         self,
         code: str,
-        state: str
+        state: str,
+        fetch_info: bool = True
     ) -> HubSpotTokenInfo:
         """
         Exchange authorization code for tokens.
@@ -175,6 +268,9 @@ class HubSpotOAuthClient:
         Args:
             code: Authorization code from callback
             state: State parameter for CSRF validation
+            fetch_info: Look up hub details via get_token_info. Pass False when
+                only the access token is needed to skip the extra round-trip;
+                scopes then default to the client's configured scopes.
         
         Returns:
             HubSpotTokenInfo with access and refresh tokens
@@ -191,7 +287,7 @@ class HubSpotOAuthClient:
         
         # Check state age (expire after 10 minutes)
         state_time = self._pending_states.pop(state)
-        if time.time() - state_time > 600:
+        if time.monotonic() - state_time > STATE_TTL_SECONDS:
             raise HubSpotOAuthError(
                 "expired_state",
                 "Authorization request expired. Please try again.",
@@ -199,30 +295,20 @@ class HubSpotOAuthClient:
             )
         
         # Exchange code for tokens
-        data = {
-            "grant_type": "authorization_code",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "redirect_uri": self.redirect_uri,
-            "code": code
-        }
+        body = self._exchange_prefix + b"&code=" + quote_plus(code).encode("ascii")
+        
+        client = self._get_client()
+        response = await client.post(_TOKEN_URL, content=body, headers=FORM_HEADERS)
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                HUBSPOT_TOKEN_URL,
-                data=data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
+        if response.status_code != 200:
+            error_data = _error_payload(response)
+            raise HubSpotOAuthError(
+                error_data.get("error", "token_exchange_failed"),
+                error_data.get("error_description", error_data.get("message", "Failed to exchange code")),
+                status_code=response.status_code
             )
-            
-            if response.status_code != 200:
-                error_data = response.json()
-                raise HubSpotOAuthError(
-                    error_data.get("error", "token_exchange_failed"),
-                    error_data.get("error_description", error_data.get("message", "Failed to exchange code")),
-                    status_code=response.status_code
-                )
-            
-            token_data = response.json()
+        
+        token_data = orjson.loads(response.content)
         
         token_info = HubSpotTokenInfo(
             access_token=token_data["access_token"],
@@ -233,42 +319,70 @@ class HubSpotOAuthClient:
         )
         
         # Get token info for hub details
+        if not fetch_info:
+            token_info.scopes = list(self.scopes)
+            return token_info
+        
         info = await self.get_token_info(token_info.access_token)
         if info:
-            token_info.hub_id = info.get("hub_id")
-            token_info.hub_domain = info.get("hub_domain")
-            token_info.user = info.get("user")
-            token_info.scopes = info.get("scopes", [])
+            self._apply_hub_meta(token_info, self._cache_hub_meta(token_info.refresh_token, info))
         
         return token_info
     
-    async def refresh_access_token(self, refresh_token: str) -> HubSpotTokenInfo:
-        """Refresh an expired access token."""
+    async def refresh_access_token(
+        self,
+        refresh_token: str,
+        fetch_info: bool = True,
+        current_token: Optional[HubSpotTokenInfo] = None
+    ) -> HubSpotTokenInfo:
+        """
+        Refresh an expired access token.
+        
+        Args:
+            refresh_token: Refresh token to exchange
+            fetch_info: Look up hub details on a metadata cache miss
+            current_token: The token being replaced; if its access token hasn't
+                reached its nominal expiry, hub details are looked up with it
+                concurrently with the refresh instead of afterwards
+        """
         self._validate_config()
         
-        data = {
-            "grant_type": "refresh_token",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "refresh_token": refresh_token
-        }
+        body = self._refresh_prefix + b"&refresh_token=" + quote_plus(refresh_token).encode("ascii")
+        
+        # Hub metadata is invariant for a refresh token; only fetch it on a cache miss
+        meta = self._hub_meta_cache.get(refresh_token)
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                HUBSPOT_TOKEN_URL,
-                data=data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
+        client = self._get_client()
+        token_request = client.post(_TOKEN_URL, content=body, headers=FORM_HEADERS)
+        info = None
+        if (
+            meta is None
+            and fetch_info
+            and current_token is not None
+            and time.time() < current_token.expires_at
+        ):
+            # Both requests go to api.hubapi.com and share the HTTP/2 connection
+            response, info = await asyncio.gather(
+                token_request,
+                self.get_token_info(current_token.access_token),
+                return_exceptions=True
             )
-            
-            if response.status_code != 200:
-                error_data = response.json()
-                raise HubSpotOAuthError(
-                    error_data.get("error", "token_refresh_failed"),
-                    error_data.get("error_description", error_data.get("message", "Failed to refresh token")),
-                    status_code=response.status_code
-                )
-            
-            token_data = response.json()
+            if isinstance(response, BaseException):
+                raise response
+            if isinstance(info, BaseException):
+                info = None
+        else:
+            response = await token_request
+        
+        if response.status_code != 200:
+            error_data = _error_payload(response)
+            raise HubSpotOAuthError(
+                error_data.get("error", "token_refresh_failed"),
+                error_data.get("error_description", error_data.get("message", "Failed to refresh token")),
+                status_code=response.status_code
+            )
+        
+        token_data = orjson.loads(response.content)
         
         token_info = HubSpotTokenInfo(
             access_token=token_data["access_token"],
@@ -278,38 +392,70 @@ class HubSpotOAuthClient:
             acquired_at=time.time()
         )
         
-        # Get updated token info
-        info = await self.get_token_info(token_info.access_token)
-        if info:
-            token_info.hub_id = info.get("hub_id")
-            token_info.hub_domain = info.get("hub_domain")
-            token_info.user = info.get("user")
-            token_info.scopes = info.get("scopes", [])
+        if meta is not None:
+            self._hub_meta_cache.pop(refresh_token, None)
+            self._hub_meta_cache[token_info.refresh_token] = meta
+            self._apply_hub_meta(token_info, meta)
+        elif not fetch_info:
+            token_info.scopes = list(self.scopes)
+        else:
+            if info is None:
+                info = await self.get_token_info(token_info.access_token)
+            if info:
+                self._apply_hub_meta(token_info, self._cache_hub_meta(token_info.refresh_token, info))
         
         return token_info
     
+    def _cache_hub_meta(self, refresh_token: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract hub metadata from a token info response and cache it."""
+        meta = {
+            "hub_id": info.get("hub_id"),
+            "hub_domain": info.get("hub_domain"),
+            "user": info.get("user"),
+            "scopes": info.get("scopes", []),
+        }
+        self._hub_meta_cache[refresh_token] = meta
+        return meta
+    
+    @staticmethod
+    def _apply_hub_meta(token_info: HubSpotTokenInfo, meta: Dict[str, Any]):
+        """Copy cached hub metadata onto a token."""
+        token_info.hub_id = meta["hub_id"]
+        token_info.hub_domain = meta["hub_domain"]
+        token_info.user = meta["user"]
+        token_info.scopes = list(meta["scopes"])
+    
     async def get_token_info(self, access_token: str) -> Optional[Dict[str, Any]]:
         """Get information about an access token."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{HUBSPOT_INFO_URL}/{access_token}"
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            return None
+        client = self._get_client()
+        response = await client.get(
+            f"{HUBSPOT_INFO_URL}/{access_token}"
+        )
+        
+        if response.status_code == 200:
+            return orjson.loads(response.content)
+        return None
     
     def store_user_token(self, user_id: str, token_info: HubSpotTokenInfo):
         """Store tokens for a user."""
         self._tokens[user_id] = token_info
+        self._tokens.move_to_end(user_id)
+        if len(self._tokens) > MAX_TOKENS:
+            _, evicted = self._tokens.popitem(last=False)
+            self._hub_meta_cache.pop(evicted.refresh_token, None)
     
     def get_user_token(self, user_id: str) -> Optional[HubSpotTokenInfo]:
         """Get stored token for a user."""
-        return self._tokens.get(user_id)
+        token_info = self._tokens.get(user_id)
+        if token_info is not None:
+            self._tokens.move_to_end(user_id)
+        return token_info
     
     def remove_user_token(self, user_id: str):
         """Remove stored token."""
-        self._tokens.pop(user_id, None)
+        token_info = self._tokens.pop(user_id, None)
+        if token_info is not None:
+            self._hub_meta_cache.pop(token_info.refresh_token, None)
     
     async def get_valid_token(self, user_id: str) -> Optional[HubSpotTokenInfo]:
         """Get a valid token, refreshing if needed."""
@@ -321,8 +467,36 @@ class HubSpotOAuthClient:
         if not token_info.is_expired:
             return token_info
         
+        # Join a refresh that is already in flight for this user; it runs in its own
+        # task, so a cancelled caller doesn't cancel or fail the others
+        return await self._inflight_refreshes.run(
+            user_id, lambda: self._refresh_user_token(user_id, token_info)
+        )
+    
+    async def _refresh_user_token(
+        self,
+        user_id: str,
+        token_info: HubSpotTokenInfo
+    ) -> Optional[HubSpotTokenInfo]:
+        """Refresh and store a user's token, dropping it if the refresh is rejected."""
         try:
-            new_token = await self.refresh_access_token(token_info.refresh_token)
+            # is_expired fires 5 minutes before nominal expiry, so the old access token can
+            # usually still look up hub details concurrently with the refresh on a metadata
+            # miss; past nominal expiry they carry over from the old token instead
+            new_token = await self.refresh_access_token(
+                token_info.refresh_token,
+                fetch_info=time.time() < token_info.expires_at,
+                current_token=token_info
+            )
+            if new_token.hub_id is None and token_info.hub_id is not None:
+                # Metadata cache miss: carry over the granted scopes too, not the configured
+                # defaults, and re-cache so later refreshes of this user hit
+                self._apply_hub_meta(new_token, self._cache_hub_meta(new_token.refresh_token, {
+                    "hub_id": token_info.hub_id,
+                    "hub_domain": token_info.hub_domain,
+                    "user": token_info.user,
+                    "scopes": token_info.scopes,
+                }))
             self.store_user_token(user_id, new_token)
             return new_token
         except HubSpotOAuthError:
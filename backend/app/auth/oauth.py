@@ -7,11 +7,15 @@ import time
 import secrets
 import hashlib
 import base64
+import functools
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from urllib.parse import urlencode, quote
 import httpx
+import orjson
 
+from ..core.cache import SingleFlight
 from ..core.logging import get_logger, log_exception
 
 logger = get_logger(__name__)
@@ -26,6 +30,18 @@ OAUTH_REDIRECT_URI = os.getenv("OAUTH_REDIRECT_URI", "http://localhost:8000/oaut
 AUTHORITY_URL = f"https://login.microsoftonline.com/{AZURE_TENANT}"
 AUTHORIZE_ENDPOINT = f"{AUTHORITY_URL}/oauth2/v2.0/authorize"
 TOKEN_ENDPOINT = f"{AUTHORITY_URL}/oauth2/v2.0/token"
+GRAPH_ME_URL = httpx.URL("https://graph.microsoft.com/v1.0/me")
+
+# Pending authorization requests expire after 10 minutes
+STATE_TTL_SECONDS = 600
+MAX_PENDING_STATES = 4096
+
+# Least-recently-used sessions are evicted beyond this many stored tokens
+MAX_TOKENS = 100_000
+
+# Graph profiles are cached briefly per access token
+USER_INFO_TTL_SECONDS = 300
+MAX_USER_INFO_ENTRIES = 4096
 
 # Default scopes for Broker Copilot
 DEFAULT_SCOPES = [
@@ -41,7 +57,28 @@ DEFAULT_SCOPES = [
 ]
 
 
-@dataclass
+@functools.lru_cache(maxsize=32)
+def _build_static_params(scopes_tuple: Tuple[str, ...], client_id: str, redirect_uri: str) -> str:
+    """Pre-encode the authorization URL parameters that don't vary per request."""
+    return urlencode({
+        "client_id": client_id,
+        "response_type": "code",
+        "redirect_uri": redirect_uri,
+        "response_mode": "query",
+        "scope": " ".join(scopes_tuple),
+    })
+
+
+def _error_payload(response: httpx.Response) -> Dict[str, Any]:
+    """Decode an error response body, falling back to the raw text if it isn't a JSON object."""
+    try:
+        data = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return {"error": response.text}
+    return data if isinstance(data, dict) else {"error": response.text}
+
+
+@dataclass(slots=True)
 class TokenInfo:
     """Represents OAuth tokens with metadata."""
     access_token: str
@@ -51,15 +88,21 @@ class TokenInfo:
     refresh_token: Optional[str] = None
     scope: str = ""
     id_token: Optional[str] = None
+    _refresh_at: float = field(default=0.0, init=False, repr=False, compare=False)
     
     def __post_init__(self):
+        now = time.time()
         if self.expires_at == 0.0:
-            self.expires_at = time.time() + self.expires_in
+            self.expires_at = now + self.expires_in
+        # expires_at stays wall-clock for to_dict(); the refresh deadline is
+        # tracked on the monotonic clock so clock jumps can't skew it.
+        # Refresh 5 minutes before actual expiry
+        self._refresh_at = time.monotonic() + (self.expires_at - now) - 300
     
     @property
     def is_expired(self) -> bool:
         """Check if access token is expired (with 5 min buffer)."""
-        return time.time() >= (self.expires_at - 300)
+        return time.monotonic() >= self._refresh_at
     
     @property
     def scopes_list(self) -> list:
@@ -78,16 +121,21 @@ class TokenInfo:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class PKCEChallenge:
     """PKCE (Proof Key for Code Exchange) challenge for enhanced security."""
-    code_verifier: str = field(default_factory=lambda: secrets.token_urlsafe(64))
+    code_verifier: str = field(default_factory=lambda: secrets.token_urlsafe(32))  # 43 chars (RFC 7636 §4.1)
+    created_at: float = field(default_factory=time.monotonic)  # Monotonic; TTL checks only
+    _challenge: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     @property
     def code_challenge(self) -> str:
-        """Generate SHA256 code challenge from verifier."""
-        digest = hashlib.sha256(self.code_verifier.encode()).digest()
-        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+        """Generate SHA256 code challenge from verifier (computed once, then cached)."""
+        if self._challenge is None:
+            # token_urlsafe output is pure ASCII
+            digest = hashlib.sha256(self.code_verifier.encode("ascii")).digest()
+            self._challenge = base64.urlsafe_b64encode(digest).rstrip(b'=').decode("ascii")
+        return self._challenge
     
     @property
     def code_challenge_method(self) -> str:
@@ -142,13 +190,42 @@ class MicrosoftOAuthClient:
             self.authorize_endpoint = AUTHORIZE_ENDPOINT
             self.token_endpoint = TOKEN_ENDPOINT
         
-        # In-memory PKCE challenge store (keyed by state)
+        # Parsed once so httpx doesn't re-parse the endpoint on every token request
+        self._token_endpoint_url = httpx.URL(self.token_endpoint)
+        
+        # In-memory PKCE challenge store (keyed by state, insertion-ordered for eviction)
         # TODO: In production, use distributed cache (Redis) with TTL
-        self._pkce_challenges: Dict[str, PKCEChallenge] = {}
+        self._pkce_challenges: "OrderedDict[str, PKCEChallenge]" = OrderedDict()
         
-        # In-memory token store (keyed by user_id)
+        # In-memory token store (keyed by user_id, LRU-ordered, capped at MAX_TOKENS)
         # TODO: In production, encrypt and store securely
-        self._tokens: Dict[str, TokenInfo] = {}
+        self._tokens: "OrderedDict[str, TokenInfo]" = OrderedDict()
+        
+        # Shared HTTP client (lazily created, pooled across OAuth calls)
+        self._http: Optional[httpx.AsyncClient] = None
+        
+        # In-flight refreshes keyed by user_id; concurrent callers share one refresh
+        self._inflight_refreshes = SingleFlight()
+        
+        # Graph /me profiles keyed by access token hash (LRU-ordered, short TTL)
+        self._user_info_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get or create the shared HTTP client."""
+        if self._http is None or self._http.is_closed:
+            logger.debug("Creating shared OAuth HTTP client")
+            self._http = httpx.AsyncClient(
+                http2=True,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+            )
+        return self._http
+    
+    async def close(self):
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
     def _validate_config(self):
         """Validate OAuth configuration."""
@@ -157,6 +234,18 @@ class MicrosoftOAuthClient:
         if not self.redirect_uri:
             raise OAuthError("configuration_error", "OAUTH_REDIRECT_URI not configured")
     
+    def _evict(self, max_size: int = MAX_PENDING_STATES, ttl: int = STATE_TTL_SECONDS):
+        """Drop expired PKCE challenges, then the oldest ones beyond max_size."""
+        now = time.monotonic()
+        while self._pkce_challenges:
+            oldest = next(iter(self._pkce_challenges.values()))
+            if now - oldest.created_at <= ttl:
+                break
+            self._pkce_challenges.popitem(last=False)
+        
+        while len(self._pkce_challenges) > max_size:
+            self._pkce_challenges.popitem(last=False)
+    
     def generate_authorization_url(
         self,
         scopes: list = None,
@@ -180,23 +269,20 @@ class MicrosoftOAuthClient:
         
         # Generate state if not provided
         if not state:
-            state = secrets.token_urlsafe(32)
+            state = secrets.token_urlsafe(16)  # 128 bits of CSRF entropy
         
         # Generate PKCE challenge
         pkce = PKCEChallenge()
         self._pkce_challenges[state] = pkce
+        self._pkce_challenges.move_to_end(state)
+        self._evict()
         
-        # Build scopes string
+        # Static parameters (client, redirect, scopes) are encoded once per scope set
         scopes = scopes or DEFAULT_SCOPES
-        scope_string = " ".join(scopes)
+        static_params = _build_static_params(tuple(scopes), self.client_id, self.redirect_uri)
         
-        # Build authorization URL parameters
+        # Per-request authorization URL parameters
         params = {
-            "client_id": self.client_id,
-            "response_type": "code",
-            "redirect_uri": self.redirect_uri,
-            "response_mode": "query",
-            "scope": scope_string,
             "state": state,
             "code_challenge": pkce.code_challenge,
             "code_challenge_method": pkce.code_challenge_method,
@@ -208,7 +294,7 @@ class MicrosoftOAuthClient:
         if prompt:
             params["prompt"] = prompt
         
-        auth_url = f"{self.authorize_endpoint}?{urlencode(params)}"
+        auth_url = f"{self.authorize_endpoint}?{static_params}&{urlencode(params)}"
         
         return auth_url, state, pkce
     
@@ -261,28 +347,28 @@ class MicrosoftOAuthClient:
         logger.info(f"Exchanging authorization code for tokens (state: {state[:8]}...)")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.token_endpoint,
-                    data=data,
-                    headers=headers
+            client = self._get_client()
+            response = await client.post(
+                self._token_endpoint_url,
+                data=data,
+                headers=headers
+            )
+            
+            if response.status_code != 200:
+                error_data = _error_payload(response)
+                logger.error(
+                    f"Token exchange failed: {error_data.get('error')} - {error_data.get('error_description')}",
+                    extra={"status_code": response.status_code}
+                )
+                raise OAuthError(
+                    error_data.get("error", "token_exchange_failed"),
+                    error_data.get("error_description", "Failed to exchange code for tokens"),
+                    status_code=response.status_code
                 )
                 
-                if response.status_code != 200:
-                    error_data = response.json()
-                    logger.error(
-                        f"Token exchange failed: {error_data.get('error')} - {error_data.get('error_description')}",
-                        extra={"status_code": response.status_code}
-                    )
-                    raise OAuthError(
-                        error_data.get("error", "token_exchange_failed"),
-                        error_data.get("error_description", "Failed to exchange code for tokens"),
-                        status_code=response.status_code
-                    )
-                
-                token_data = response.json()
-                logger.info("Token exchange successful")
-                
+            token_data = orjson.loads(response.content)
+            logger.info("Token exchange successful")
+            
         except httpx.TimeoutException:
             logger.error("Token exchange timed out")
             raise OAuthError("timeout", "Token exchange request timed out", status_code=504)
@@ -340,28 +426,28 @@ class MicrosoftOAuthClient:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.token_endpoint,
-                    data=data,
-                    headers=headers
+            client = self._get_client()
+            response = await client.post(
+                self._token_endpoint_url,
+                data=data,
+                headers=headers
+            )
+            
+            if response.status_code != 200:
+                error_data = _error_payload(response)
+                logger.warning(
+                    f"Token refresh failed: {error_data.get('error')}",
+                    extra={"status_code": response.status_code}
+                )
+                raise OAuthError(
+                    error_data.get("error", "token_refresh_failed"),
+                    error_data.get("error_description", "Failed to refresh token"),
+                    status_code=response.status_code
                 )
                 
-                if response.status_code != 200:
-                    error_data = response.json()
-                    logger.warning(
-                        f"Token refresh failed: {error_data.get('error')}",
-                        extra={"status_code": response.status_code}
-                    )
-                    raise OAuthError(
-                        error_data.get("error", "token_refresh_failed"),
-                        error_data.get("error_description", "Failed to refresh token"),
-                        status_code=response.status_code
-                    )
-                
-                token_data = response.json()
-                logger.info("Token refresh successful")
-                
+            token_data = orjson.loads(response.content)
+            logger.info("Token refresh successful")
+            
         except httpx.TimeoutException:
             logger.error("Token refresh timed out")
             raise OAuthError("timeout", "Token refresh request timed out", status_code=504)
@@ -391,10 +477,17 @@ class MicrosoftOAuthClient:
         """
         logger.debug(f"Storing token for user: {user_id}")
         self._tokens[user_id] = token_info
+        self._tokens.move_to_end(user_id)
+        if len(self._tokens) > MAX_TOKENS:
+            evicted_user, _ = self._tokens.popitem(last=False)
+            logger.debug(f"Evicted least-recently-used token for user: {evicted_user}")
     
     def get_user_token(self, user_id: str) -> Optional[TokenInfo]:
         """Retrieve stored token for a user."""
-        return self._tokens.get(user_id)
+        token_info = self._tokens.get(user_id)
+        if token_info is not None:
+            self._tokens.move_to_end(user_id)
+        return token_info
     
     def remove_user_token(self, user_id: str):
         """Remove stored token for a user (logout)."""
@@ -421,6 +514,14 @@ class MicrosoftOAuthClient:
             logger.debug(f"Token for user {user_id} is still valid")
             return token_info
         
+        # Join a refresh that is already in flight for this user; it runs in its own
+        # task, so a cancelled caller doesn't cancel or fail the others
+        return await self._inflight_refreshes.run(
+            user_id, lambda: self._refresh_user_token(user_id, token_info)
+        )
+    
+    async def _refresh_user_token(self, user_id: str, token_info: TokenInfo) -> Optional[TokenInfo]:
+        """Refresh and store a user's token, dropping it if the refresh is not possible."""
         logger.info(f"Token for user {user_id} is expired, attempting refresh")
         
         # Token is expired, try to refresh
@@ -451,27 +552,41 @@ class MicrosoftOAuthClient:
         Returns:
             User profile dict with id, displayName, mail, etc.
         """
+        cache_key = hashlib.blake2b(access_token.encode(), digest_size=16).hexdigest()
+        cached = self._user_info_cache.get(cache_key)
+        if cached is not None:
+            cached_at, user_info = cached
+            if time.monotonic() - cached_at < USER_INFO_TTL_SECONDS:
+                self._user_info_cache.move_to_end(cache_key)
+                logger.debug("User info served from cache")
+                return dict(user_info)
+            del self._user_info_cache[cache_key]
+        
         logger.debug("Fetching user info from Microsoft Graph")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    "https://graph.microsoft.com/v1.0/me",
-                    headers={"Authorization": f"Bearer {access_token}"}
+            client = self._get_client()
+            response = await client.get(
+                GRAPH_ME_URL,
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
+            
+            if response.status_code != 200:
+                logger.error(f"Failed to fetch user info: {response.status_code}")
+                raise OAuthError(
+                    "user_info_failed",
+                    f"Failed to fetch user info: {response.status_code}",
+                    status_code=response.status_code
                 )
                 
-                if response.status_code != 200:
-                    logger.error(f"Failed to fetch user info: {response.status_code}")
-                    raise OAuthError(
-                        "user_info_failed",
-                        f"Failed to fetch user info: {response.status_code}",
-                        status_code=response.status_code
-                    )
-                
-                user_info = response.json()
-                logger.debug(f"User info retrieved for: {user_info.get('displayName', 'unknown')}")
-                return user_info
-                
+            user_info = orjson.loads(response.content)
+            logger.debug(f"User info retrieved for: {user_info.get('displayName', 'unknown')}")
+            
+            self._user_info_cache[cache_key] = (time.monotonic(), user_info)
+            if len(self._user_info_cache) > MAX_USER_INFO_ENTRIES:
+                self._user_info_cache.popitem(last=False)
+            return dict(user_info)
+            
         except httpx.TimeoutException:
             logger.error("User info request timed out")
             raise OAuthError("timeout", "User info request timed out", status_code=504)
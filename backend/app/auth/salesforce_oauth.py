@@ -4,11 +4,16 @@ Handles authorization code flow for Salesforce API access.
 """
 import os
 import time
+import asyncio
 import secrets
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from urllib.parse import urlencode, quote
 import httpx
 
+from ..core.cache import SingleFlight
+
 # Salesforce OAuth Configuration
 SF_CLIENT_ID = os.getenv("SALESFORCE_CLIENT_ID", "")
 SF_CLIENT_SECRET = os.getenv("SALESFORCE_CLIENT_SECRET", "")
@@ -23,6 +28,29 @@ SF_REVOKE_URL = "https://login.salesforce.com/services/oauth2/revoke"
 # SF_AUTH_URL = "https://test.salesforce.com/services/oauth2/authorize"
 # SF_TOKEN_URL = "https://test.salesforce.com/services/oauth2/token"
 
+# Pending authorization requests expire after 10 minutes
+STATE_TTL_SECONDS = 600
+MAX_PENDING_STATES = 4096
+
+# Salesforce doesn't return expires_in; sessions typically last 2 hours, so treat
+# tokens as good for 90 minutes and refresh 5 minutes before that
+TOKEN_LIFETIME_SECONDS = 5400
+REFRESH_BUFFER_SECONDS = 300
+
+# Least-recently-used sessions are evicted beyond this many stored tokens
+MAX_TOKENS = 100_000
+
+# Identity payloads are static over a session, so cache them per id_url
+USER_INFO_TTL_SECONDS = 3600
+MAX_USER_INFO_ENTRIES = 1024
+
+# Token calls sit in front of every authenticated request, so keep budgets tight
+TOKEN_TIMEOUT = httpx.Timeout(connect=5.0, read=10.0, write=5.0, pool=2.0)
+
+# Transient network failures on the token endpoint are retried once
+TOKEN_RETRIES = 1
+TOKEN_RETRY_BACKOFF = 0.5
+
 
 @dataclass
 class SalesforceTokenInfo:
@@ -43,9 +71,9 @@ class SalesforceTokenInfo:
     def is_expired(self) -> bool:
         """
         Salesforce tokens don't include expires_in, but typically last 2 hours.
-        We'll consider them expired after 1.5 hours to be safe.
+        We'll consider them expired after 1.5 hours to be safe (refreshing 5 min early).
         """
-        return time.time() >= (self.issued_at + 5400)  # 90 minutes
+        return time.time() >= self.issued_at + TOKEN_LIFETIME_SECONDS - REFRESH_BUFFER_SECONDS
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -98,11 +126,62 @@ class SalesforceOAuthClient:
             self.token_url = SF_TOKEN_URL
             self.revoke_url = SF_REVOKE_URL
         
-        # In-memory state store for CSRF protection
-        self._pending_states: Dict[str, float] = {}
+        # Authorization URL parameters that don't vary per request, encoded once
+        self._static_auth_qs = urlencode({
+            "client_id": self.client_id,
+            "redirect_uri": self.redirect_uri,
+            "response_type": "code",
+        })
+        
+        # In-memory state store for CSRF protection (insertion-ordered for eviction)
+        self._pending_states: "OrderedDict[str, float]" = OrderedDict()
+        
+        # In-memory token store (LRU-ordered, capped at MAX_TOKENS)
+        self._tokens: "OrderedDict[str, SalesforceTokenInfo]" = OrderedDict()
+        
+        # Shared HTTP client (lazily created, pooled across OAuth calls)
+        self._http: Optional[httpx.AsyncClient] = None
         
-        # In-memory token store
-        self._tokens: Dict[str, SalesforceTokenInfo] = {}
+        # In-flight refreshes keyed by user_id; concurrent callers share one refresh
+        self._inflight_refreshes = SingleFlight()
+        
+        # Identity responses keyed by id_url (LRU-ordered, TTL-bounded)
+        self._user_info_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get or create the shared HTTP client."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                http2=True,
+                timeout=TOKEN_TIMEOUT,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+            )
+        return self._http
+    
+    async def close(self):
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def _post_token(self, data: Dict[str, str]) -> httpx.Response:
+        """POST to the token endpoint, retrying transient network failures with backoff."""
+        client = self._get_client()
+        for attempt in range(TOKEN_RETRIES + 1):
+            try:
+                return await client.post(
+                    self.token_url,
+                    data=data,
+                    headers={"Content-Type": "application/x-www-form-urlencoded"}
+                )
+            except httpx.TransportError as e:  # Includes timeouts
+                if attempt == TOKEN_RETRIES:
+                    raise SalesforceOAuthError(
+                        "timeout",
+                        f"Salesforce token endpoint did not respond: {e}",
+                        status_code=504
+                    )
+                await asyncio.sleep(TOKEN_RETRY_BACKOFF * (2 ** attempt))
     
     def _validate_config(self):
         """Validate OAuth configuration."""
@@ -111,6 +190,18 @@ class SalesforceOAuthClient:
         if not self.client_secret:
             raise SalesforceOAuthError("configuration_error", "SALESFORCE_CLIENT_SECRET not configured")
     
+    def _evict(self, max_size: int = MAX_PENDING_STATES, ttl: int = STATE_TTL_SECONDS):
+        """Drop expired pending states, then the oldest ones beyond max_size."""
+        now = time.monotonic()
+        while self._pending_states:
+            oldest_time = next(iter(self._pending_states.values()))
+            if now - oldest_time <= ttl:
+                break
+            self._pending_states.popitem(last=False)
+        
+        while len(self._pending_states) > max_size:
+            self._pending_states.popitem(last=False)
+    
     def generate_authorization_url(
         self,
         state: str = None,
@@ -129,22 +220,15 @@ class SalesforceOAuthClient:
         self._validate_config()
         
         if not state:
-            state = secrets.token_urlsafe(32)
+            state = secrets.token_urlsafe(16)  # 128 bits of CSRF entropy
         
-        # Store state with timestamp for validation
-        self._pending_states[state] = time.time()
+        # Store state with timestamp for validation (monotonic; only used for TTL checks)
+        self._pending_states[state] = time.monotonic()
+        self._pending_states.move_to_end(state)
+        self._evict()
         
-        # Build authorization URL
-        params = {
-            "client_id": self.client_id,
-            "redirect_uri": self.redirect_uri,
-            "response_type": "code",
-            "state": state,
-            "prompt": prompt
-        }
-        
-        from urllib.parse import urlencode
-        auth_url = f"{self.auth_url}?{urlencode(params)}"
+        # Build authorization URL (static parameters are pre-encoded in __init__)
+        auth_url = f"{self.auth_url}?{self._static_auth_qs}&state={quote(state, safe='')}&prompt={quote(prompt, safe='')}"
         
         return auth_url, state
     
@@ -175,7 +259,7 @@ class SalesforceOAuthClient:
         
         # Check state age (expire after 10 minutes)
         state_time = self._pending_states.pop(state)
-        if time.time() - state_time > 600:
+        if time.monotonic() - state_time > STATE_TTL_SECONDS:
             raise SalesforceOAuthError(
                 "expired_state",
                 "Authorization request expired. Please try again.",
@@ -191,22 +275,17 @@ class SalesforceOAuthClient:
             "code": code
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                self.token_url,
-                data=data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
+        response = await self._post_token(data)
+        
+        if response.status_code != 200:
+            error_data = response.json()
+            raise SalesforceOAuthError(
+                error_data.get("error", "token_exchange_failed"),
+                error_data.get("error_description", "Failed to exchange code"),
+                status_code=response.status_code
             )
-            
-            if response.status_code != 200:
-                error_data = response.json()
-                raise SalesforceOAuthError(
-                    error_data.get("error", "token_exchange_failed"),
-                    error_data.get("error_description", "Failed to exchange code"),
-                    status_code=response.status_code
-                )
-            
-            token_data = response.json()
+        
+        token_data = response.json()
         
         token_info = SalesforceTokenInfo(
             access_token=token_data["access_token"],
@@ -231,22 +310,17 @@ class SalesforceOAuthClient:
             "refresh_token": refresh_token
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                self.token_url,
-                data=data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
+        response = await self._post_token(data)
+        
+        if response.status_code != 200:
+            error_data = response.json()
+            raise SalesforceOAuthError(
+                error_data.get("error", "token_refresh_failed"),
+                error_data.get("error_description", "Failed to refresh token"),
+                status_code=response.status_code
             )
-            
-            if response.status_code != 200:
-                error_data = response.json()
-                raise SalesforceOAuthError(
-                    error_data.get("error", "token_refresh_failed"),
-                    error_data.get("error_description", "Failed to refresh token"),
-                    status_code=response.status_code
-                )
-            
-            token_data = response.json()
+        
+        token_data = response.json()
         
         # Refresh response may not include new refresh token
         return SalesforceTokenInfo(
@@ -258,41 +332,82 @@ class SalesforceOAuthClient:
         )
     
     async def revoke_token(self, token: str) -> bool:
-        """Revoke an access or refresh token."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
+        """Revoke an access or refresh token; False if Salesforce can't be reached or refuses."""
+        client = self._get_client()
+        try:
+            # Only the status matters; streaming lets us close without reading the body
+            async with client.stream(
+                "POST",
                 self.revoke_url,
                 data={"token": token},
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            return response.status_code == 200
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+                follow_redirects=False
+            ) as response:
+                return 200 <= response.status_code < 300
+        except httpx.HTTPError:
+            return False
+    
+    async def revoke_all(self, token_info: SalesforceTokenInfo) -> bool:
+        """Revoke a session's access and refresh tokens concurrently."""
+        tokens = [token_info.access_token]
+        if token_info.refresh_token:
+            tokens.append(token_info.refresh_token)
+        results = await asyncio.gather(
+            *(self.revoke_token(token) for token in tokens),
+            return_exceptions=True
+        )
+        return all(result is True for result in results)
     
     async def get_user_info(self, token_info: SalesforceTokenInfo) -> Dict[str, Any]:
         """Get user info from the identity URL."""
         if not token_info.id_url:
             return {}
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                token_info.id_url,
-                headers={"Authorization": f"Bearer {token_info.access_token}"}
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            return {}
+        key = token_info.id_url
+        cached = self._user_info_cache.get(key)
+        if cached is not None:
+            cached_at, user_info = cached
+            if time.monotonic() - cached_at < USER_INFO_TTL_SECONDS:
+                self._user_info_cache.move_to_end(key)
+                return dict(user_info)
+            del self._user_info_cache[key]
+        
+        client = self._get_client()
+        response = await client.get(
+            token_info.id_url,
+            headers={"Authorization": f"Bearer {token_info.access_token}"}
+        )
+        
+        if response.status_code == 200:
+            user_info = response.json()
+            self._user_info_cache[key] = (time.monotonic(), user_info)
+            if len(self._user_info_cache) > MAX_USER_INFO_ENTRIES:
+                self._user_info_cache.popitem(last=False)
+            return dict(user_info)
+        return {}
+    
+    def _invalidate_user_info(self, token_info: Optional[SalesforceTokenInfo]):
+        """Drop the cached identity response for a token."""
+        if token_info is not None and token_info.id_url:
+            self._user_info_cache.pop(token_info.id_url, None)
     
     def store_user_token(self, user_id: str, token_info: SalesforceTokenInfo):
         """Store tokens for a user."""
         self._tokens[user_id] = token_info
+        self._tokens.move_to_end(user_id)
+        if len(self._tokens) > MAX_TOKENS:
+            self._tokens.popitem(last=False)
     
     def get_user_token(self, user_id: str) -> Optional[SalesforceTokenInfo]:
         """Get stored token for a user."""
-        return self._tokens.get(user_id)
+        token_info = self._tokens.get(user_id)
+        if token_info is not None:
+            self._tokens.move_to_end(user_id)
+        return token_info
     
     def remove_user_token(self, user_id: str):
         """Remove stored token."""
-        self._tokens.pop(user_id, None)
+        self._invalidate_user_info(self._tokens.pop(user_id, None))
     
     async def get_valid_token(self, user_id: str) -> Optional[SalesforceTokenInfo]:
         """Get a valid token, refreshing if needed."""
@@ -304,16 +419,31 @@ class SalesforceOAuthClient:
         if not token_info.is_expired:
             return token_info
         
+        # Join a refresh that is already in flight for this user; it runs in its own
+        # task, so a cancelled caller doesn't cancel or fail the others
+        return await self._inflight_refreshes.run(
+            user_id, lambda: self._refresh_user_token(user_id, token_info)
+        )
+    
+    async def _refresh_user_token(
+        self,
+        user_id: str,
+        token_info: SalesforceTokenInfo
+    ) -> Optional[SalesforceTokenInfo]:
+        """Refresh and store a user's token, dropping it if the refresh is not possible."""
         if not token_info.refresh_token:
             self.remove_user_token(user_id)
             return None
         
         try:
             new_token = await self.refresh_access_token(token_info.refresh_token)
+            self._invalidate_user_info(token_info)
             self.store_user_token(user_id, new_token)
             return new_token
-        except SalesforceOAuthError:
-            self.remove_user_token(user_id)
+        except SalesforceOAuthError as e:
+            # A timed-out refresh says nothing about the refresh token; keep it for the next attempt
+            if e.error != "timeout":
+                self.remove_user_token(user_id)
             return None
 
 
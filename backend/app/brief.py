@@ -3,22 +3,67 @@ Brief Generation Module
 Fetches multi-source data and synthesizes comprehensive policy briefs using Gemini LLM.
 """
 import os
+import re
 import json
 import asyncio
-from typing import Dict, Any, List, AsyncGenerator
+import copy
+from typing import Dict, Any, List, Tuple, AsyncGenerator
 
 from .connectors.microsoft_graph import MicrosoftGraphConnector
 from .priority import deterministic_score
 from .llm.gemini import get_gemini_client, GeminiConfig, BRIEF_SYSTEM_PROMPT
-from .llm.provenance import build_provenance_map, inject_links, calculate_confidence_score
+from .llm.provenance import build_provenance_map, inject_links, calculate_confidence_score, StreamingLinkInjector
 from .core.logging import get_logger
+from .core.cache import MISSING, SingleFlight, TTLCache, async_ttl_cache
 
 logger = get_logger(__name__)
 
 # Flag to control LLM usage (can be disabled for testing)
 USE_LLM = os.getenv("USE_LLM", "true").lower() == "true"
 
-
+# Shared by every brief; GeminiClient only reads it
+_BRIEF_GEMINI_CONFIG = GeminiConfig(
+    temperature=0.3,
+    max_output_tokens=2048,
+    system_instruction=BRIEF_SYSTEM_PROMPT
+)
+
+# CRM/Calendar/Teams lookups are cached per call arguments for this long; once
+# they call real connectors, per-user credentials must be part of the arguments
+FETCH_TTL_SECONDS = 60
+MAX_CACHED_FETCHES = 1024
+
+# Source data is reused briefly so a streamed brief right after a regular one
+# (same policy, same user) doesn't refetch everything
+SOURCES_TTL_SECONDS = 30
+MAX_CACHED_SOURCES = 512
+
+# (policy_id, access_token) -> (policy, emails, meetings, chats); concurrent misses share one fetch
+_sources_cache = TTLCache(SOURCES_TTL_SECONDS, MAX_CACHED_SOURCES)
+_inflight_sources = SingleFlight()
+
+# Provenance work on source sets larger than this runs in a worker thread
+OFFLOAD_RECORD_THRESHOLD = 32
+
+# In-flight brief generations keyed like _sources_cache; concurrent callers share one generation
+_inflight_briefs = SingleFlight()
+
+# Section headers the brief prompt asks the LLM to produce, matched in a single pass;
+# a section runs until the next line that opens with bold text
+_SECTION_RE = re.compile(
+    r'\*\*(?P<h>Policy Overview|Risk Analysis|Recent Communications Summary|Suggested Next Actions)\*\*'
+    r'[:\s]*(?P<body>.*?)(?=\n\*\*|\Z)',
+    re.DOTALL | re.IGNORECASE
+)
+_HEADER_TO_KEY = {
+    "policy overview": "policy_overview",
+    "risk analysis": "risk_analysis",
+    "recent communications summary": "recent_communications",
+    "suggested next actions": "suggested_actions",
+}
+
+
+@async_ttl_cache(FETCH_TTL_SECONDS, MAX_CACHED_FETCHES)
 async def fetch_policy_data(policy_id: str) -> Dict[str, Any]:
     """Fetch policy data from CRM connector.
     # TODO: Replace with actual CRM connector call using OAuth tokens.
@@ -43,6 +88,7 @@ async def fetch_policy_data(policy_id: str) -> Dict[str, Any]:
     return policy
 
 
+@async_ttl_cache(FETCH_TTL_SECONDS, MAX_CACHED_FETCHES)
 async def fetch_meetings_data(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     """Fetch calendar meetings from Calendar connector.
     # TODO: Replace with actual Calendar connector call.
@@ -71,6 +117,7 @@ async def fetch_meetings_data(query: str, limit: int = 5) -> List[Dict[str, Any]
     return meetings
 
 
+@async_ttl_cache(FETCH_TTL_SECONDS, MAX_CACHED_FETCHES)
 async def fetch_chats_data(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     """Fetch Teams chat mentions from Teams connector.
     # TODO: Replace with actual Teams connector call.
@@ -91,6 +138,40 @@ async def fetch_chats_data(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     return chats
 
 
+async def _fetch_sources(
+    policy_id: str,
+    connectors_settings: Dict[str, Any]
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Fetch policy, emails, meetings and chats in parallel, reusing a recent fetch if one exists."""
+    mg = MicrosoftGraphConnector(connectors_settings.get("microsoft") or {})
+    
+    # Emails depend on whose mailbox is searched, so the token is part of the key
+    key = (policy_id, mg.access_token or "")
+    sources = _sources_cache.get(key)
+    if sources is not MISSING:
+        logger.debug("Reusing recently fetched sources", extra={"policy_id": policy_id})
+    else:
+        sources = await _inflight_sources.run(key, lambda: _load_sources(key, mg))
+    # Callers annotate the records they get, so none of them may share the cached ones
+    return copy.deepcopy(sources)
+
+
+async def _load_sources(
+    key: Tuple[str, str],
+    mg: MicrosoftGraphConnector
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Fetch every source for key's policy and cache the result."""
+    policy_id = key[0]
+    sources = tuple(await asyncio.gather(
+        fetch_policy_data(policy_id),
+        mg.fetch_snippets(query=policy_id, limit=5),
+        fetch_meetings_data(policy_id, limit=5),
+        fetch_chats_data(policy_id, limit=5)
+    ))
+    _sources_cache.set(key, sources)
+    return sources
+
+
 async def generate_brief(policy_id: str, connectors_settings: Dict[str, Any]) -> Dict[str, Any]:
     """
     Fetch multi-source data and synthesize a comprehensive brief using Gemini LLM.
@@ -103,17 +184,21 @@ async def generate_brief(policy_id: str, connectors_settings: Dict[str, Any]) ->
     Returns:
         Dictionary containing policy data, sources, narrative, and provenance map
     """
+    # Join a generation that is already in flight for this policy and user; it runs
+    # in its own task, so one caller disconnecting doesn't fail the others
+    key = (policy_id, (connectors_settings.get("microsoft") or {}).get("access_token") or "")
+    result = await _inflight_briefs.run(key, lambda: _generate_brief(policy_id, connectors_settings))
+    # Each caller gets its own copy of the shared result
+    return copy.deepcopy(result)
+
+
+async def _generate_brief(policy_id: str, connectors_settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate a brief (see generate_brief)."""
     logger.info(f"Generating brief for policy", extra={"policy_id": policy_id})
-    mg = MicrosoftGraphConnector(connectors_settings.get("microsoft", {}))
 
     # Parallel fetch from all sources
     logger.debug("Fetching data from multiple sources in parallel")
-    policy, emails, meetings, chats = await asyncio.gather(
-        fetch_policy_data(policy_id),
-        mg.fetch_snippets(query=policy_id, limit=5),
-        fetch_meetings_data(policy_id, limit=5),
-        fetch_chats_data(policy_id, limit=5)
-    )
+    policy, emails, meetings, chats = await _fetch_sources(policy_id, connectors_settings)
     
     logger.debug(
         "Data fetched successfully",
@@ -136,7 +221,12 @@ async def generate_brief(policy_id: str, connectors_settings: Dict[str, Any]) ->
         "meetings": meetings,
         "chats": chats
     }
-    provenance = build_provenance_map(sources)
+    # Typical briefs are tiny; only large source sets are worth a thread hop
+    offload = 1 + len(emails) + len(meetings) + len(chats) > OFFLOAD_RECORD_THRESHOLD
+    if offload:
+        provenance = await asyncio.to_thread(build_provenance_map, sources)
+    else:
+        provenance = build_provenance_map(sources)
     logger.debug(f"Provenance map built with {len(provenance)} entries")
 
     # Generate narrative using LLM or fallback
@@ -159,7 +249,10 @@ async def generate_brief(policy_id: str, connectors_settings: Dict[str, Any]) ->
         )
 
     # Inject citation links
-    narrative_with_links, citation_info = inject_links(raw_narrative, provenance)
+    if offload:
+        narrative_with_links, citation_info = await asyncio.to_thread(inject_links, raw_narrative, provenance)
+    else:
+        narrative_with_links, citation_info = inject_links(raw_narrative, provenance)
     logger.debug(f"Injected {len(citation_info)} citations into narrative")
 
     # Calculate confidence
@@ -212,53 +305,7 @@ async def generate_brief_via_gemini(
     client = get_gemini_client()
     
     # Build the data context for the LLM
-    data_context = f"""
-## Policy Data [SOURCE:{policy['id']}]
-- Policy Number: {policy['policy_number']}
-- Client: {policy['client_name']}
-- Type: {policy.get('policy_type', 'N/A')}
-- Premium at Risk: ${policy['premium_at_risk']:,.2f}
-- Coverage Limit: ${policy.get('coverage_limit', 0):,.2f}
-- Deductible: ${policy.get('deductible', 0):,.2f}
-- Expiry Date: {policy['expiry_date']}
-- Days to Expiry: {policy['days_to_expiry']}
-- Claims Frequency: {policy['claims_frequency']}
-- Underwriter: {policy.get('underwriter', 'N/A')}
-
-## Priority Score
-- Overall Score: {score:.2f} (0-1 scale, higher = more urgent)
-- Premium Component: {breakdown['premium_component']:.3f}
-- Time Urgency Component: {breakdown['time_component']:.3f}
-- Claims Risk Component: {breakdown['claims_component']:.3f}
-
-## Recent Emails ({len(emails)} found)
-"""
-    for email in emails:
-        data_context += f"""
-### Email [SOURCE:{email['id']}]
-- Subject: {email['subject']}
-- Date: {email['timestamp']}
-- Snippet: {email.get('snippet', 'N/A')}
-"""
-    
-    data_context += f"\n## Recent Meetings ({len(meetings)} found)\n"
-    for meeting in meetings:
-        data_context += f"""
-### Meeting [SOURCE:{meeting['id']}]
-- Subject: {meeting['subject']}
-- Date: {meeting['timestamp']}
-- Notes: {meeting.get('notes', 'N/A')}
-"""
-    
-    data_context += f"\n## Teams Mentions ({len(chats)} found)\n"
-    for chat in chats:
-        data_context += f"""
-### Chat [SOURCE:{chat['id']}]
-- Subject: {chat['subject']}
-- Date: {chat['timestamp']}
-- From: {chat.get('from', 'N/A')}
-- Snippet: {chat.get('snippet', 'N/A')}
-"""
+    data_context = _build_data_context(policy, emails, meetings, chats, score, breakdown, verbose=True)
 
     user_prompt = f"""Based on the following data from connected systems, generate a comprehensive policy renewal brief.
 
@@ -272,11 +319,7 @@ Please structure your response with these sections:
 
 Remember to include [SOURCE:id] citations for every fact you mention."""
 
-    config = GeminiConfig(
-        temperature=0.3,
-        max_output_tokens=2048,
-        system_instruction=BRIEF_SYSTEM_PROMPT
-    )
+    config = _BRIEF_GEMINI_CONFIG
 
     messages = [
         {
@@ -322,20 +365,11 @@ def parse_brief_sections(raw_text: str) -> Dict[str, Any]:
         "full_text": raw_text
     }
     
-    # Simple section extraction based on headers
-    import re
-    
-    patterns = [
-        (r'\*\*Policy Overview\*\*[:\s]*(.*?)(?=\*\*|$)', 'policy_overview'),
-        (r'\*\*Risk Analysis\*\*[:\s]*(.*?)(?=\*\*|$)', 'risk_analysis'),
-        (r'\*\*Recent Communications Summary\*\*[:\s]*(.*?)(?=\*\*|$)', 'recent_communications'),
-        (r'\*\*Suggested Next Actions\*\*[:\s]*(.*?)(?=\*\*|$)', 'suggested_actions'),
-    ]
-    
-    for pattern, key in patterns:
-        match = re.search(pattern, raw_text, re.DOTALL | re.IGNORECASE)
-        if match:
-            sections[key] = match.group(1).strip()
+    # Simple section extraction based on headers (first occurrence of each wins)
+    for match in _SECTION_RE.finditer(raw_text):
+        key = _HEADER_TO_KEY[match["h"].lower()]
+        if not sections[key]:
+            sections[key] = match["body"].strip()
     
     return sections
 
@@ -352,23 +386,34 @@ def generate_brief_fallback(
     Fallback brief generation when LLM is unavailable.
     Still includes citation markers for provenance tracking.
     """
-    overview = f"Policy {policy['policy_number']} for {policy['client_name']} [SOURCE:{policy['id']}]. "
-    overview += f"This is a {policy.get('policy_type', 'commercial')} policy with premium at risk of ${policy['premium_at_risk']:,.2f} [SOURCE:{policy['id']}]."
+    # Fields used repeatedly below are looked up once
+    pid = policy['id']
+    premium = policy['premium_at_risk']
     
-    risk = f"**Priority Score: {score:.2f}** [SOURCE:{policy['id']}]\n"
-    risk += f"- Premium at risk: ${policy['premium_at_risk']:,.2f} contributes {breakdown['premium_component']:.1%} to priority\n"
-    risk += f"- Time urgency ({policy['days_to_expiry']} days to expiry) contributes {breakdown['time_component']:.1%}\n"
-    risk += f"- Claims frequency ({policy['claims_frequency']}) contributes {breakdown['claims_component']:.1%}"
+    overview = (
+        f"Policy {policy['policy_number']} for {policy['client_name']} [SOURCE:{pid}]. "
+        f"This is a {policy.get('policy_type', 'commercial')} policy with premium at risk of ${premium:,.2f} [SOURCE:{pid}]."
+    )
+    
+    risk = "\n".join([
+        f"**Priority Score: {score:.2f}** [SOURCE:{pid}]",
+        f"- Premium at risk: ${premium:,.2f} contributes {breakdown['premium_component']:.1%} to priority",
+        f"- Time urgency ({policy['days_to_expiry']} days to expiry) contributes {breakdown['time_component']:.1%}",
+        f"- Claims frequency ({policy['claims_frequency']}) contributes {breakdown['claims_component']:.1%}",
+    ])
     
-    comms = f"Found {len(emails)} recent emails"
+    comms_parts = [f"Found {len(emails)} recent emails"]
     if emails:
-        comms += f", most recent: \"{emails[0]['subject']}\" ({emails[0]['timestamp']}) [SOURCE:{emails[0]['id']}]"
-    comms += f"\nFound {len(meetings)} meetings"
+        latest_email = emails[0]
+        comms_parts.append(f", most recent: \"{latest_email['subject']}\" ({latest_email['timestamp']}) [SOURCE:{latest_email['id']}]")
+    comms_parts.append(f"\nFound {len(meetings)} meetings")
     if meetings:
-        comms += f", most recent: \"{meetings[0]['subject']}\" [SOURCE:{meetings[0]['id']}]"
+        latest_meeting = meetings[0]
+        comms_parts.append(f", most recent: \"{latest_meeting['subject']}\" [SOURCE:{latest_meeting['id']}]")
+    comms = "".join(comms_parts)
     
     actions = [
-        f"Review and contact client regarding renewal options [SOURCE:{policy['id']}]",
+        f"Review and contact client regarding renewal options [SOURCE:{pid}]",
         "Prepare competitive quote comparison",
     ]
     if score > 0.7:
@@ -405,18 +450,11 @@ async def stream_brief(policy_id: str, connectors_settings: Dict[str, Any]) -> A
     Stream the brief generation for reduced perceived latency.
     Yields chunks of the brief as they become available.
     """
-    mg = MicrosoftGraphConnector(connectors_settings.get("microsoft", {}))
-
     # First, stream the data gathering status
     yield "📊 Gathering data from connected sources...\n\n"
     
     # Parallel fetch
-    policy, emails, meetings, chats = await asyncio.gather(
-        fetch_policy_data(policy_id),
-        mg.fetch_snippets(query=policy_id, limit=5),
-        fetch_meetings_data(policy_id, limit=5),
-        fetch_chats_data(policy_id, limit=5)
-    )
+    policy, emails, meetings, chats = await _fetch_sources(policy_id, connectors_settings)
     
     yield f"✅ Policy data loaded: {policy['policy_number']}\n"
     yield f"✅ Found {len(emails)} emails, {len(meetings)} meetings, {len(chats)} chat mentions\n\n"
@@ -425,12 +463,12 @@ async def stream_brief(policy_id: str, connectors_settings: Dict[str, Any]) -> A
     score, breakdown = deterministic_score(policy)
     yield f"📈 Priority Score: **{score:.2f}**\n\n"
     
-    # Build provenance
+    yield "🤖 Generating AI analysis...\n\n---\n\n"
+    
+    # Build provenance (every branch below resolves citations against it)
     sources = {"policy": policy, "emails": emails, "meetings": meetings, "chats": chats}
     provenance = build_provenance_map(sources)
     
-    yield "🤖 Generating AI analysis...\n\n---\n\n"
-    
     if USE_LLM:
         # Stream from Gemini
         client = get_gemini_client()
@@ -442,20 +480,20 @@ async def stream_brief(policy_id: str, connectors_settings: Dict[str, Any]) -> A
 
 Include [SOURCE:id] citations for facts."""
 
-        config = GeminiConfig(
-            temperature=0.3,
-            max_output_tokens=2048,
-            system_instruction=BRIEF_SYSTEM_PROMPT
-        )
+        config = _BRIEF_GEMINI_CONFIG
 
         messages = [{"role": "user", "parts": [{"text": user_prompt}]}]
         
         try:
-            buffer = ""
+            # Inject links as soon as each citation marker is complete
+            injector = StreamingLinkInjector(provenance)
             async for chunk in client.generate_stream(messages, config):
-                buffer += chunk
-                # Inject links in real-time (simplified - full injection at end)
-                yield chunk
+                text = injector.feed(chunk)
+                if text:
+                    yield text
+            text = injector.flush()
+            if text:
+                yield text
             
             # Final provenance section
             yield "\n\n---\n📎 **Data Provenance:**\n"
@@ -477,17 +515,74 @@ Include [SOURCE:id] citations for facts."""
         )
         text_with_links, _ = inject_links(raw_text, provenance)
         
-        # Stream in chunks for effect
-        words = text_with_links.split()
-        chunk_size = 10
-        for i in range(0, len(words), chunk_size):
-            yield " ".join(words[i:i+chunk_size]) + " "
-            await asyncio.sleep(0.05)
+        # Stream in fixed-size chunks; the HTTP response does the pacing
+        chunk_size = 512
+        for i in range(0, len(text_with_links), chunk_size):
+            yield text_with_links[i:i + chunk_size]
+
+
+def _build_data_context(policy, emails, meetings, chats, score, breakdown, verbose: bool = False) -> str:
+    """Build the data context string for LLM prompts (verbose for full briefs, compact for streaming)."""
+    if verbose:
+        return _render_verbose_data_context(policy, emails, meetings, chats, score, breakdown)
+    return _render_compact_data_context(policy, emails, meetings, chats, score)
 
 
-def _build_data_context(policy, emails, meetings, chats, score, breakdown) -> str:
-    """Build the data context string for LLM prompts."""
-    ctx = f"""## Policy [SOURCE:{policy['id']}]
+def _render_verbose_data_context(policy, emails, meetings, chats, score, breakdown) -> str:
+    """Render the detailed data context used for full brief generation."""
+    parts = [f"""
+## Policy Data [SOURCE:{policy['id']}]
+- Policy Number: {policy['policy_number']}
+- Client: {policy['client_name']}
+- Type: {policy.get('policy_type', 'N/A')}
+- Premium at Risk: ${policy['premium_at_risk']:,.2f}
+- Coverage Limit: ${policy.get('coverage_limit', 0):,.2f}
+- Deductible: ${policy.get('deductible', 0):,.2f}
+- Expiry Date: {policy['expiry_date']}
+- Days to Expiry: {policy['days_to_expiry']}
+- Claims Frequency: {policy['claims_frequency']}
+- Underwriter: {policy.get('underwriter', 'N/A')}
+
+## Priority Score
+- Overall Score: {score:.2f} (0-1 scale, higher = more urgent)
+- Premium Component: {breakdown['premium_component']:.3f}
+- Time Urgency Component: {breakdown['time_component']:.3f}
+- Claims Risk Component: {breakdown['claims_component']:.3f}
+
+## Recent Emails ({len(emails)} found)
+"""]
+    for email in emails:
+        parts.append(f"""
+### Email [SOURCE:{email['id']}]
+- Subject: {email['subject']}
+- Date: {email['timestamp']}
+- Snippet: {email.get('snippet', 'N/A')}
+""")
+    
+    parts.append(f"\n## Recent Meetings ({len(meetings)} found)\n")
+    for meeting in meetings:
+        parts.append(f"""
+### Meeting [SOURCE:{meeting['id']}]
+- Subject: {meeting['subject']}
+- Date: {meeting['timestamp']}
+- Notes: {meeting.get('notes', 'N/A')}
+""")
+    
+    parts.append(f"\n## Teams Mentions ({len(chats)} found)\n")
+    for chat in chats:
+        parts.append(f"""
+### Chat [SOURCE:{chat['id']}]
+- Subject: {chat['subject']}
+- Date: {chat['timestamp']}
+- From: {chat.get('from', 'N/A')}
+- Snippet: {chat.get('snippet', 'N/A')}
+""")
+    return "".join(parts)
+
+
+def _render_compact_data_context(policy, emails, meetings, chats, score) -> str:
+    """Render the short data context used for streamed briefs."""
+    parts = [f"""## Policy [SOURCE:{policy['id']}]
 - Number: {policy['policy_number']}
 - Client: {policy['client_name']}
 - Premium: ${policy['premium_at_risk']:,.2f}
@@ -496,16 +591,16 @@ def _build_data_context(policy, emails, meetings, chats, score, breakdown) -> st
 - Score: {score:.2f}
 
 ## Emails
-"""
+"""]
     for e in emails:
-        ctx += f"- [{e['id']}] {e['subject']} ({e['timestamp']})\n"
+        parts.append(f"- [{e['id']}] {e['subject']} ({e['timestamp']})\n")
     
-    ctx += "\n## Meetings\n"
+    parts.append("\n## Meetings\n")
     for m in meetings:
-        ctx += f"- [{m['id']}] {m['subject']} ({m['timestamp']})\n"
+        parts.append(f"- [{m['id']}] {m['subject']} ({m['timestamp']})\n")
     
-    ctx += "\n## Chats\n"
+    parts.append("\n## Chats\n")
     for c in chats:
-        ctx += f"- [{c['id']}] {c['subject']} ({c['timestamp']})\n"
+        parts.append(f"- [{c['id']}] {c['subject']} ({c['timestamp']})\n")
     
-    return ctx
+    return "".join(parts)
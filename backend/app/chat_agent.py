@@ -4,11 +4,17 @@ Implements connector-backed Q&A with Gemini function-calling for multi-hop reaso
 """
 import os
 import re
+import bisect
+import json
 import asyncio
-from typing import Dict, Any, List, Optional
+import contextlib
+import types
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Set, Tuple, Callable, Awaitable, Mapping, AsyncIterator, AsyncGenerator
 
 from .connectors.microsoft_graph import MicrosoftGraphConnector
-from .priority import deterministic_score
+from .priority import deterministic_score, deterministic_score_batch
 from .llm.gemini import (
     get_gemini_client, 
     GeminiConfig, 
@@ -18,32 +24,134 @@ from .llm.gemini import (
 from .llm.provenance import (
     build_provenance_map, 
     inject_links, 
+    inject_links_from_segments,
     calculate_confidence_score
 )
 from .core.logging import get_logger
+from .core.cache import async_ttl_cache
 
 logger = get_logger(__name__)
 
 # Flag to control LLM usage
 USE_LLM = os.getenv("USE_LLM", "true").lower() == "true"
 
+# Shared by every chat request; GeminiClient only reads them
+_CHAT_GEMINI_CONFIG = GeminiConfig(
+    temperature=0.2,  # Lower for more factual responses
+    max_output_tokens=1024,
+    system_instruction=CHAT_SYSTEM_PROMPT,
+    functions=BROKER_FUNCTIONS,
+    cache_prefix=True
+)
+# Final streamed answer, once tool results are in the conversation
+_CHAT_ANSWER_GEMINI_CONFIG = GeminiConfig(
+    temperature=0.2,
+    max_output_tokens=1024,
+    system_instruction=CHAT_SYSTEM_PROMPT,
+    cache_prefix=True
+)
+
+# Tool results are reused across requests for this long; stale CRM data expires naturally
+TOOL_CACHE_TTL_SECONDS = 300
+MAX_CACHED_TOOL_RESULTS = 512
+
+# ToolFunctions instances keyed by their connector settings, reused across requests (LRU-ordered)
+MAX_CACHED_TOOLS = 1024
+_tools_cache: "OrderedDict[str, ToolFunctions]" = OrderedDict()
+
+# Provenance collected by the tools for the current request
+_provenance: ContextVar[Dict[str, str]] = ContextVar("provenance")
+# Policies already fetched during the current request, so follow-up tools can reuse them
+_request_policies: ContextVar[Dict[str, Dict[str, Any]]] = ContextVar("request_policies")
+
+# Streamed chat chunks read ahead of the client; bounds memory if the client is slow
+STREAM_PREFETCH_CHUNKS = 16
+_STREAM_END = object()
+
+# find_emails calls arriving within this window share one Graph $batch request
+SNIPPET_BATCH_WINDOW_SECONDS = 0.005
+
+# Priority score bands: a score at or above _SCORE_THRESHOLDS[i] gets _SCORE_LABELS[i + 1]
+_SCORE_THRESHOLDS = (0.4, 0.6, 0.8)
+_SCORE_LABELS = (
+    "LOW - Monitor and plan",
+    "MEDIUM - Schedule follow-up",
+    "HIGH - Prioritize this week",
+    "CRITICAL - Immediate action required",
+)
+
+# Fallback pattern matching, compiled once at import
+_POLICY_RE = re.compile(r'POL[-_ ]?(\w+)', re.IGNORECASE)
+# Plain substring alternation, matching the original `keyword in message_lower` checks.
+# "last" is not an intent of its own; the underwriter handler uses it as a modifier.
+_INTENT_RE = re.compile(r'underwriter|priority|score|urgent|email|meeting|calendar|client|who is|last')
+
+
+def _tool_cache(ttl_seconds: float = TOOL_CACHE_TTL_SECONDS, maxsize: int = MAX_CACHED_TOOL_RESULTS):
+    """Cache a ToolFunctions loader's results per (user, args) for ttl_seconds.
+    
+    Concurrent misses for the same key share one call, and cancelling one caller
+    doesn't affect the others. Hits return a deep copy so callers can't mutate
+    the cached value.
+    """
+    return async_ttl_cache(
+        ttl_seconds,
+        maxsize,
+        key=lambda self, *args, **kwargs: (self._cache_scope, args, tuple(sorted(kwargs.items())))
+    )
+
 
 class ToolFunctions:
     """
     Function handlers for Gemini function-calling.
     Each method corresponds to a declared function in BROKER_FUNCTIONS.
     """
+    # Provenance is per-request (see the provenance property), so instances hold only these
+    __slots__ = ("mg", "_cache_scope", "_pending_snippet_queries", "_snippet_flush", "handlers")
     
     def __init__(self, connectors_settings: Dict[str, Any]):
         self.mg = MicrosoftGraphConnector(connectors_settings.get("microsoft", {}))
-        self.provenance: Dict[str, str] = {}
+        # Cached tool results are scoped to the caller's Graph token
+        self._cache_scope = self.mg.access_token or ""
+        # Email searches waiting for the current coalescing window to close
+        self._pending_snippet_queries: List[Tuple[str, int, asyncio.Future]] = []
+        # Task that closes the current coalescing window (kept referenced while it runs)
+        self._snippet_flush: Optional[asyncio.Task] = None
+        # Gemini function name -> bound handler, built once per instance
+        self.handlers: Mapping[str, Callable[..., Awaitable[Any]]] = types.MappingProxyType({
+            "get_policy_details": self.get_policy_details,
+            "find_emails": self.find_emails,
+            "find_meetings": self.find_meetings,
+            "get_client_info": self.get_client_info,
+            "calculate_renewal_priority": self.calculate_renewal_priority,
+        })
         logger.debug("ToolFunctions initialized")
     
+    @property
+    def provenance(self) -> Dict[str, str]:
+        """Source links recorded for the current request (instances are shared across requests)."""
+        try:
+            return _provenance.get()
+        except LookupError:
+            provenance: Dict[str, str] = {}
+            _provenance.set(provenance)
+            return provenance
+    
     async def get_policy_details(self, policy_id: str) -> Dict[str, Any]:
         """Retrieve policy details from CRM."""
-        logger.debug(f"Fetching policy details", extra={"policy_id": policy_id})
+        policy = await self._load_policy_details(policy_id)
+        self.provenance[policy_id] = policy["link"]
+        try:
+            _request_policies.get()[policy_id] = policy
+        except LookupError:
+            _request_policies.set({policy_id: policy})
+        return policy
+    
+    @_tool_cache()
+    async def _load_policy_details(self, policy_id: str) -> Dict[str, Any]:
+        """Load a policy record from CRM (cached)."""
+        logger.debug("Fetching policy details", extra={"policy_id": policy_id})
         # TODO: Replace with actual CRM connector call
-        await asyncio.sleep(0)
         policy = {
             "id": policy_id,
             "policy_number": f"POL-{policy_id}" if not policy_id.startswith("POL-") else policy_id,
@@ -57,24 +165,71 @@ class ToolFunctions:
             "coverage_limit": 500000.0,
             "link": f"https://crm.example.com/policy/{policy_id}"
         }
-        self.provenance[policy_id] = policy["link"]
-        logger.debug(f"Retrieved policy details", extra={"policy_id": policy_id, "client": policy["client_name"]})
+        logger.debug("Retrieved policy details", extra={"policy_id": policy_id, "client": policy["client_name"]})
         return policy
     
     async def find_emails(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search for emails matching the query."""
-        logger.debug(f"Searching for emails", extra={"query": query, "limit": limit})
-        emails = await self.mg.fetch_snippets(query=query, limit=limit)
+        emails = await self._load_emails(query, limit)
         for email in emails:
             self.provenance[email["id"]] = email.get("link", "")
-        logger.debug(f"Found {len(emails)} emails")
         return emails
     
+    @_tool_cache()
+    async def _load_emails(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Search the mailbox via Graph (cached)."""
+        logger.debug("Searching for emails", extra={"query": query, "limit": limit})
+        emails = await self._fetch_snippets_coalesced(query, limit)
+        logger.debug("Found %d emails", len(emails))
+        return emails
+    
+    async def _fetch_snippets_coalesced(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Queue an email search; the first caller in a window schedules the batch for everyone."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending_snippet_queries.append((query, limit, future))
+        if len(self._pending_snippet_queries) == 1:
+            # Instances are shared across requests, so the flush runs in its own task:
+            # cancelling the request that opened the window must not fail the others
+            self._snippet_flush = asyncio.create_task(self._flush_snippet_queries())
+        return await asyncio.shield(future)
+    
+    async def _flush_snippet_queries(self) -> None:
+        """Close the current coalescing window and resolve its searches with one $batch call."""
+        # Later callers append to this same list until the window closes
+        pending = self._pending_snippet_queries
+        try:
+            await asyncio.sleep(SNIPPET_BATCH_WINDOW_SECONDS)
+            self._pending_snippet_queries = []
+            results = await self.mg.fetch_snippets_batch([(q, n) for q, n, _ in pending])
+        except asyncio.CancelledError:
+            if self._pending_snippet_queries is pending:
+                self._pending_snippet_queries = []
+            for _, _, waiter in pending:
+                waiter.cancel()
+            raise
+        except Exception as e:
+            for _, _, waiter in pending:
+                if not waiter.done():
+                    waiter.set_exception(e)
+                    waiter.exception()  # Mark retrieved in case the caller was cancelled
+            return
+        
+        for (_, _, waiter), result in zip(pending, results):
+            if not waiter.done():
+                waiter.set_result(result)
+    
     async def find_meetings(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search for calendar meetings."""
-        logger.debug(f"Searching for meetings", extra={"query": query, "limit": limit})
+        meetings = await self._load_meetings(query, limit)
+        for meeting in meetings:
+            self.provenance[meeting["id"]] = meeting.get("link", "")
+        return meetings
+    
+    @_tool_cache()
+    async def _load_meetings(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Load matching calendar meetings (cached)."""
+        logger.debug("Searching for meetings", extra={"query": query, "limit": limit})
         # TODO: Replace with actual Calendar connector call
-        await asyncio.sleep(0)
         meetings = [
             {
                 "id": "mtg-1",
@@ -92,15 +247,19 @@ class ToolFunctions:
                 "link": "https://calendar.example.com/event/mtg-2"
             }
         ][:limit]
-        for meeting in meetings:
-            self.provenance[meeting["id"]] = meeting.get("link", "")
         return meetings
     
     async def get_client_info(self, client_identifier: str) -> Dict[str, Any]:
         """Look up client information."""
-        logger.debug(f"Looking up client info", extra={"client_identifier": client_identifier})
+        client = await self._load_client_info(client_identifier)
+        self.provenance[client["id"]] = client["link"]
+        return client
+    
+    @_tool_cache()
+    async def _load_client_info(self, client_identifier: str) -> Dict[str, Any]:
+        """Load a client record from CRM (cached)."""
+        logger.debug("Looking up client info", extra={"client_identifier": client_identifier})
         # TODO: Replace with actual CRM connector call
-        await asyncio.sleep(0)
         client = {
             "id": f"client-{client_identifier.lower().replace(' ', '-')}",
             "name": client_identifier if not client_identifier.startswith("client-") else "ACME Corporation",
@@ -110,16 +269,16 @@ class ToolFunctions:
             "policies": ["POL-123", "POL-456"],
             "link": f"https://crm.example.com/client/{client_identifier}"
         }
-        self.provenance[client["id"]] = client["link"]
-        logger.debug(f"Retrieved client info", extra={"client_id": client["id"], "name": client["name"]})
+        logger.debug("Retrieved client info", extra={"client_id": client["id"], "name": client["name"]})
         return client
     
     async def calculate_renewal_priority(self, policy_id: str) -> Dict[str, Any]:
         """Calculate priority score for a policy renewal."""
-        logger.debug(f"Calculating renewal priority", extra={"policy_id": policy_id})
-        policy = await self.get_policy_details(policy_id)
+        logger.debug("Calculating renewal priority", extra={"policy_id": policy_id})
+        # Reuse the policy if get_policy_details already ran for it in this request
+        policy = _request_policies.get({}).get(policy_id) or await self.get_policy_details(policy_id)
         score, breakdown = deterministic_score(policy)
-        logger.debug(f"Calculated priority score: {score:.2f}", extra={"policy_id": policy_id})
+        logger.debug("Calculated priority score: %.2f", score, extra={"policy_id": policy_id})
         return {
             "policy_id": policy_id,
             "score": score,
@@ -127,18 +286,44 @@ class ToolFunctions:
             "interpretation": _interpret_score(score),
             "link": policy.get("link", "")
         }
+    
+    async def calculate_renewal_priority_batch(self, policy_ids: List[str]) -> List[Dict[str, Any]]:
+        """Calculate priority scores for many policies, e.g. for a dashboard."""
+        logger.debug("Calculating renewal priorities", extra={"count": len(policy_ids)})
+        policies = await asyncio.gather(*(self.get_policy_details(pid) for pid in policy_ids))
+        return [
+            {
+                "policy_id": policy_id,
+                "score": score,
+                "breakdown": breakdown,
+                "interpretation": _interpret_score(score),
+                "link": policy.get("link", "")
+            }
+            for policy_id, policy, (score, breakdown) in zip(
+                policy_ids, policies, deterministic_score_batch(policies)
+            )
+        ]
+
+
+def _get_tools(connectors_settings: Dict[str, Any]) -> ToolFunctions:
+    """Get a cached ToolFunctions for these settings and start fresh per-request state."""
+    _provenance.set({})
+    _request_policies.set({})
+    settings_key = json.dumps(connectors_settings, sort_keys=True, default=str)
+    
+    tools = _tools_cache.get(settings_key)
+    if tools is None:
+        tools = _tools_cache[settings_key] = ToolFunctions(connectors_settings)
+        if len(_tools_cache) > MAX_CACHED_TOOLS:
+            _tools_cache.popitem(last=False)
+    else:
+        _tools_cache.move_to_end(settings_key)
+    return tools
 
 
 def _interpret_score(score: float) -> str:
     """Generate human-readable interpretation of priority score."""
-    if score >= 0.8:
-        return "CRITICAL - Immediate action required"
-    elif score >= 0.6:
-        return "HIGH - Prioritize this week"
-    elif score >= 0.4:
-        return "MEDIUM - Schedule follow-up"
-    else:
-        return "LOW - Monitor and plan"
+    return _SCORE_LABELS[bisect.bisect_right(_SCORE_THRESHOLDS, score)]
 
 
 async def handle_chat_message(
@@ -158,7 +343,7 @@ async def handle_chat_message(
     message = payload.get("message", "").strip()
     user_id = payload.get("user_id", "unknown")
     
-    logger.info(f"Processing chat message", extra={"user_id": user_id, "message_length": len(message)})
+    logger.info("Processing chat message", extra={"user_id": user_id, "message_length": len(message)})
     
     if not message:
         logger.warning("Empty chat message received")
@@ -168,7 +353,7 @@ async def handle_chat_message(
             "provenance": {}
         }
     
-    tools = ToolFunctions(connectors_settings)
+    tools = _get_tools(connectors_settings)
     
     if USE_LLM:
         logger.debug("Processing with Gemini LLM")
@@ -183,21 +368,9 @@ async def _handle_with_gemini(message: str, tools: ToolFunctions) -> Dict[str, A
     logger.info("Starting Gemini chat processing")
     client = get_gemini_client()
     
-    # Build function handlers map
-    function_handlers = {
-        "get_policy_details": tools.get_policy_details,
-        "find_emails": tools.find_emails,
-        "find_meetings": tools.find_meetings,
-        "get_client_info": tools.get_client_info,
-        "calculate_renewal_priority": tools.calculate_renewal_priority,
-    }
+    function_handlers = tools.handlers
     
-    config = GeminiConfig(
-        temperature=0.2,  # Lower for more factual responses
-        max_output_tokens=1024,
-        system_instruction=CHAT_SYSTEM_PROMPT,
-        functions=BROKER_FUNCTIONS
-    )
+    config = _CHAT_GEMINI_CONFIG
     
     messages = [
         {
@@ -268,162 +441,226 @@ async def _handle_with_gemini(message: str, tools: ToolFunctions) -> Dict[str, A
         }
         
     except Exception as e:
-        logger.error(f"Gemini chat processing failed, using fallback", extra={"error": str(e)})
+        logger.error("Gemini chat processing failed, using fallback", extra={"error": str(e)})
         # Fallback on error
         fallback_result = await _handle_with_fallback(message, tools)
         fallback_result["error"] = str(e)
         return fallback_result
 
 
+async def _fallback_underwriter(
+    message: str,
+    keywords: Set[str],
+    policy_id: Optional[str],
+    tools: ToolFunctions,
+    function_calls: List[Dict[str, Any]]
+) -> Tuple[str, List[Dict[str, Any]], float]:
+    """Answer an underwriter question, optionally with their latest email."""
+    if not policy_id:
+        return "Please specify a policy ID (e.g., POL-123) to look up the underwriter.", [], 0.3
+    
+    policy = await tools.get_policy_details(policy_id)
+    function_calls.append({"function": "get_policy_details", "args": {"policy_id": policy_id}})
+    
+    # Check for email follow-up
+    if "email" in keywords or "last" in keywords:
+        underwriter = policy.get("underwriter", "Unknown")
+        emails = await tools.find_emails(query=underwriter, limit=3)
+        function_calls.append({"function": "find_emails", "args": {"query": underwriter}})
+        
+        segments = [(f"The underwriter for {policy['policy_number']} is **{underwriter}** ", policy_id)]
+        if emails:
+            segments.append((
+                f". Your last email mentioning them was \"{emails[0]['subject']}\" on {emails[0]['timestamp']} ",
+                emails[0]["id"]
+            ))
+            segments.append((".", None))
+        else:
+            segments.append((". I couldn't find recent emails mentioning them.", None))
+    else:
+        segments = [
+            (f"The underwriter for {policy['policy_number']} is **{policy.get('underwriter', 'Unknown')}** ", policy_id),
+            (".", None),
+        ]
+    
+    answer_with_links, citation_info = inject_links_from_segments(segments, tools.provenance)
+    return answer_with_links, citation_info, 0.8
+
+
+async def _fallback_priority(
+    message: str,
+    keywords: Set[str],
+    policy_id: Optional[str],
+    tools: ToolFunctions,
+    function_calls: List[Dict[str, Any]]
+) -> Tuple[str, List[Dict[str, Any]], float]:
+    """Answer a renewal priority/score question."""
+    if not policy_id:
+        return "Please specify a policy ID to calculate renewal priority.", [], 0.3
+    
+    result = await tools.calculate_renewal_priority(policy_id)
+    function_calls.append({"function": "calculate_renewal_priority", "args": {"policy_id": policy_id}})
+    
+    segments = [
+        (f"The renewal priority for {policy_id} is **{result['score']:.2f}** ({result['interpretation']}) ", policy_id),
+        (
+            f". Breakdown: Premium risk {result['breakdown']['premium_component']:.1%}, "
+            f"Time urgency {result['breakdown']['time_component']:.1%}, "
+            f"Claims factor {result['breakdown']['claims_component']:.1%}.",
+            None
+        ),
+    ]
+    answer_with_links, citation_info = inject_links_from_segments(segments, tools.provenance)
+    return answer_with_links, citation_info, 0.85
+
+
+async def _fallback_emails(
+    message: str,
+    keywords: Set[str],
+    policy_id: Optional[str],
+    tools: ToolFunctions,
+    function_calls: List[Dict[str, Any]]
+) -> Tuple[str, List[Dict[str, Any]], float]:
+    """Search emails for the terms left after dropping the keyword."""
+    # Extract search terms
+    search_terms = message.replace("email", "").replace("emails", "").strip()
+    if not search_terms and policy_id:
+        search_terms = policy_id
+    
+    if not search_terms:
+        return "What would you like me to search for in your emails?", [], 0.2
+    
+    emails = await tools.find_emails(query=search_terms, limit=5)
+    function_calls.append({"function": "find_emails", "args": {"query": search_terms}})
+    
+    if emails:
+        # Header, blank line, then one cited line per email
+        segments = [(f"Found {len(emails)} emails matching \"{search_terms}\":\n", None)]
+        segments.extend(
+            (f"\n{i}. **{email['subject']}** ({email['timestamp']}) ", email["id"])
+            for i, email in enumerate(emails[:3], 1)
+        )
+    else:
+        segments = [(f"I couldn't find emails matching \"{search_terms}\".", None)]
+    
+    answer_with_links, citation_info = inject_links_from_segments(segments, tools.provenance)
+    return answer_with_links, citation_info, 0.7 if emails else 0.4
+
+
+async def _fallback_meetings(
+    message: str,
+    keywords: Set[str],
+    policy_id: Optional[str],
+    tools: ToolFunctions,
+    function_calls: List[Dict[str, Any]]
+) -> Tuple[str, List[Dict[str, Any]], float]:
+    """List meetings for the policy, or renewal meetings in general."""
+    search_terms = policy_id or "renewal"
+    meetings = await tools.find_meetings(query=search_terms, limit=5)
+    function_calls.append({"function": "find_meetings", "args": {"query": search_terms}})
+    
+    if meetings:
+        segments = [(f"Found {len(meetings)} meetings:\n", None)]
+        segments.extend(
+            (f"\n{i}. **{meeting['subject']}** ({meeting['timestamp']}) ", meeting["id"])
+            for i, meeting in enumerate(meetings[:3], 1)
+        )
+    else:
+        segments = [("I couldn't find relevant meetings.", None)]
+    
+    answer_with_links, citation_info = inject_links_from_segments(segments, tools.provenance)
+    return answer_with_links, citation_info, 0.7 if meetings else 0.4
+
+
+async def _fallback_client(
+    message: str,
+    keywords: Set[str],
+    policy_id: Optional[str],
+    tools: ToolFunctions,
+    function_calls: List[Dict[str, Any]]
+) -> Tuple[str, List[Dict[str, Any]], float]:
+    """Look up the client behind a policy."""
+    # Try to extract client name
+    client_name = None
+    if policy_id:
+        policy = await tools.get_policy_details(policy_id)
+        client_name = policy.get("client_name")
+        function_calls.append({"function": "get_policy_details", "args": {"policy_id": policy_id}})
+    
+    if not client_name:
+        return "Please specify a policy ID or client name to look up.", [], 0.3
+    
+    client = await tools.get_client_info(client_name)
+    function_calls.append({"function": "get_client_info", "args": {"client_identifier": client_name}})
+    
+    segments = [
+        (f"**{client['name']}** ", client["id"]),
+        (
+            f"\n- Email: {client['contact_email']}\n"
+            f"- Phone: {client['contact_phone']}\n"
+            f"- Industry: {client['industry']}\n"
+            f"- Policies: {', '.join(client['policies'])}",
+            None
+        ),
+    ]
+    answer_with_links, citation_info = inject_links_from_segments(segments, tools.provenance)
+    return answer_with_links, citation_info, 0.8
+
+
+# Fallback intents in precedence order; the first keyword present in the message wins
+_FALLBACK_HANDLERS = {
+    "underwriter": _fallback_underwriter,
+    "priority": _fallback_priority,
+    "score": _fallback_priority,
+    "urgent": _fallback_priority,
+    "email": _fallback_emails,
+    "meeting": _fallback_meetings,
+    "calendar": _fallback_meetings,
+    "client": _fallback_client,
+    "who is": _fallback_client,
+}
+
+# Help text for messages that match no intent
+FALLBACK_HELP_TEXT = (
+    "I can help you with:\n"
+    "- Looking up policy details (e.g., \"What's the status of POL-123?\")\n"
+    "- Finding the underwriter for a policy\n"
+    "- Searching emails and meetings\n"
+    "- Calculating renewal priority scores\n"
+    "- Looking up client information\n\n"
+    "Please ask a specific question about a policy or client."
+)
+
+
 async def _handle_with_fallback(message: str, tools: ToolFunctions) -> Dict[str, Any]:
     """
     Fallback handler using pattern matching when LLM is unavailable.
     Demonstrates the function-calling concept without actual LLM.
     """
     logger.debug("Processing message with fallback pattern matching")
-    message_lower = message.lower()
-    function_calls = []
-    
-    # Pattern matching for common queries
     
-    # Policy lookup
-    policy_match = re.search(r'POL[-_ ]?(\w+)', message, re.IGNORECASE)
-    policy_id = None
-    if policy_match:
-        policy_id = policy_match.group(0)
+    # One pass over the lowered message collects every keyword; handlers check
+    # this set instead of rescanning, and precedence follows _FALLBACK_HANDLERS order
+    keywords = {match.group(0) for match in _INTENT_RE.finditer(message.lower())}
+    handler = next((h for keyword, h in _FALLBACK_HANDLERS.items() if keyword in keywords), None)
+    if handler is None:
+        # Default - can't understand; nothing else to look at
+        return {
+            "answer": FALLBACK_HELP_TEXT,
+            "confidence": 0.5,
+            "provenance": tools.provenance,
+            "citations": [],
+            "function_calls": []
+        }
     
-    # Underwriter query
-    if "underwriter" in message_lower:
-        if policy_id:
-            policy = await tools.get_policy_details(policy_id)
-            function_calls.append({"function": "get_policy_details", "args": {"policy_id": policy_id}})
-            
-            # Check for email follow-up
-            if "email" in message_lower or "last" in message_lower:
-                underwriter = policy.get("underwriter", "Unknown")
-                emails = await tools.find_emails(query=underwriter, limit=3)
-                function_calls.append({"function": "find_emails", "args": {"query": underwriter}})
-                
-                if emails:
-                    answer = (
-                        f"The underwriter for {policy['policy_number']} is **{underwriter}** [SOURCE:{policy_id}]. "
-                        f"Your last email mentioning them was \"{emails[0]['subject']}\" on {emails[0]['timestamp']} [SOURCE:{emails[0]['id']}]."
-                    )
-                else:
-                    answer = (
-                        f"The underwriter for {policy['policy_number']} is **{underwriter}** [SOURCE:{policy_id}]. "
-                        f"I couldn't find recent emails mentioning them."
-                    )
-            else:
-                answer = f"The underwriter for {policy['policy_number']} is **{policy.get('underwriter', 'Unknown')}** [SOURCE:{policy_id}]."
-            
-            answer_with_links, citation_info = inject_links(answer, tools.provenance)
-            confidence = 0.8
-        else:
-            answer_with_links = "Please specify a policy ID (e.g., POL-123) to look up the underwriter."
-            citation_info = []
-            confidence = 0.3
-    
-    # Priority/score query
-    elif "priority" in message_lower or "score" in message_lower or "urgent" in message_lower:
-        if policy_id:
-            result = await tools.calculate_renewal_priority(policy_id)
-            function_calls.append({"function": "calculate_renewal_priority", "args": {"policy_id": policy_id}})
-            
-            answer = (
-                f"The renewal priority for {policy_id} is **{result['score']:.2f}** ({result['interpretation']}) [SOURCE:{policy_id}]. "
-                f"Breakdown: Premium risk {result['breakdown']['premium_component']:.1%}, "
-                f"Time urgency {result['breakdown']['time_component']:.1%}, "
-                f"Claims factor {result['breakdown']['claims_component']:.1%}."
-            )
-            answer_with_links, citation_info = inject_links(answer, tools.provenance)
-            confidence = 0.85
-        else:
-            answer_with_links = "Please specify a policy ID to calculate renewal priority."
-            citation_info = []
-            confidence = 0.3
-    
-    # Email search
-    elif "email" in message_lower:
-        # Extract search terms
-        search_terms = message.replace("email", "").replace("emails", "").strip()
-        if not search_terms and policy_id:
-            search_terms = policy_id
-        
-        if search_terms:
-            emails = await tools.find_emails(query=search_terms, limit=5)
-            function_calls.append({"function": "find_emails", "args": {"query": search_terms}})
-            
-            if emails:
-                answer = f"Found {len(emails)} emails matching \"{search_terms}\":\n"
-                for i, email in enumerate(emails[:3], 1):
-                    answer += f"\n{i}. **{email['subject']}** ({email['timestamp']}) [SOURCE:{email['id']}]"
-            else:
-                answer = f"I couldn't find emails matching \"{search_terms}\"."
-            
-            answer_with_links, citation_info = inject_links(answer, tools.provenance)
-            confidence = 0.7 if emails else 0.4
-        else:
-            answer_with_links = "What would you like me to search for in your emails?"
-            citation_info = []
-            confidence = 0.2
-    
-    # Meeting search
-    elif "meeting" in message_lower or "calendar" in message_lower:
-        search_terms = policy_id or "renewal"
-        meetings = await tools.find_meetings(query=search_terms, limit=5)
-        function_calls.append({"function": "find_meetings", "args": {"query": search_terms}})
-        
-        if meetings:
-            answer = f"Found {len(meetings)} meetings:\n"
-            for i, meeting in enumerate(meetings[:3], 1):
-                answer += f"\n{i}. **{meeting['subject']}** ({meeting['timestamp']}) [SOURCE:{meeting['id']}]"
-        else:
-            answer = "I couldn't find relevant meetings."
-        
-        answer_with_links, citation_info = inject_links(answer, tools.provenance)
-        confidence = 0.7 if meetings else 0.4
-    
-    # Client lookup
-    elif "client" in message_lower or "who is" in message_lower:
-        # Try to extract client name
-        client_name = None
-        if policy_id:
-            policy = await tools.get_policy_details(policy_id)
-            client_name = policy.get("client_name")
-            function_calls.append({"function": "get_policy_details", "args": {"policy_id": policy_id}})
-        
-        if client_name:
-            client = await tools.get_client_info(client_name)
-            function_calls.append({"function": "get_client_info", "args": {"client_identifier": client_name}})
-            
-            answer = (
-                f"**{client['name']}** [SOURCE:{client['id']}]\n"
-                f"- Email: {client['contact_email']}\n"
-                f"- Phone: {client['contact_phone']}\n"
-                f"- Industry: {client['industry']}\n"
-                f"- Policies: {', '.join(client['policies'])}"
-            )
-            answer_with_links, citation_info = inject_links(answer, tools.provenance)
-            confidence = 0.8
-        else:
-            answer_with_links = "Please specify a policy ID or client name to look up."
-            citation_info = []
-            confidence = 0.3
+    # Policy lookup, only needed once an intent matched
+    policy_match = _POLICY_RE.search(message)
+    policy_id = policy_match.group(0) if policy_match else None
     
-    # Default - can't understand
-    else:
-        answer_with_links = (
-            "I can help you with:\n"
-            "- Looking up policy details (e.g., \"What's the status of POL-123?\")\n"
-            "- Finding the underwriter for a policy\n"
-            "- Searching emails and meetings\n"
-            "- Calculating renewal priority scores\n"
-            "- Looking up client information\n\n"
-            "Please ask a specific question about a policy or client."
-        )
-        citation_info = []
-        confidence = 0.5
+    function_calls = []
+    answer_with_links, citation_info, confidence = await handler(
+        message, keywords, policy_id, tools, function_calls
+    )
     
     return {
         "answer": answer_with_links,
@@ -441,9 +678,48 @@ async def stream_chat_response(
     """
     Stream chat response for reduced perceived latency.
     Yields chunks as they become available.
+    
+    Chunks are produced by a background task into a bounded queue, so Gemini's
+    stream keeps being read while the client is still receiving earlier chunks.
     """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_PREFETCH_CHUNKS)
+    producer = asyncio.create_task(_fill_queue(_chat_chunks(payload, connectors_settings), queue))
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Stop reading from Gemini if the client went away
+        producer.cancel()
+
+
+async def _fill_queue(chunks: AsyncGenerator[str, None], queue: asyncio.Queue):
+    """Drain an async generator into a queue, ending with _STREAM_END or the error raised.
+    
+    The generator is closed on the way out, so its cleanup (e.g. closing the Gemini
+    stream) runs here when the producer is cancelled rather than at garbage collection.
+    """
+    try:
+        async with contextlib.aclosing(chunks):
+            async for chunk in chunks:
+                await queue.put(chunk)
+    except Exception as e:
+        await queue.put(e)
+    else:
+        await queue.put(_STREAM_END)
+
+
+async def _chat_chunks(
+    payload: Dict[str, Any],
+    connectors_settings: Dict[str, Any]
+) -> AsyncIterator[str]:
+    """Produce the chunks of a streamed chat response."""
     message = payload.get("message", "").strip()
-    tools = ToolFunctions(connectors_settings)
+    tools = _get_tools(connectors_settings)
     
     if not USE_LLM:
         # For fallback, just get the full response and yield it
@@ -453,82 +729,66 @@ async def stream_chat_response(
     
     client = get_gemini_client()
     
-    function_handlers = {
-        "get_policy_details": tools.get_policy_details,
-        "find_emails": tools.find_emails,
-        "find_meetings": tools.find_meetings,
-        "get_client_info": tools.get_client_info,
-        "calculate_renewal_priority": tools.calculate_renewal_priority,
-    }
+    function_handlers = tools.handlers
     
-    config = GeminiConfig(
-        temperature=0.2,
-        max_output_tokens=1024,
-        system_instruction=CHAT_SYSTEM_PROMPT,
-        functions=BROKER_FUNCTIONS
-    )
+    config = _CHAT_GEMINI_CONFIG
     
     messages = [{"role": "user", "parts": [{"text": message}]}]
     
-    # First, we need to handle function calls (non-streaming)
-    # Then stream the final response
+    # Stream the first turn, starting each tool as soon as its call arrives,
+    # then stream the final answer once the tool results are in
+    tool_calls: List[Tuple[Dict[str, Any], asyncio.Task]] = []
     try:
-        # Initial generation to check for function calls
-        result = await client.generate(messages, config)
+        received_parts = False
+        saw_function_call = False
+        async for part in client.generate_stream_parts(messages, config):
+            received_parts = True
+            if "functionCall" in part:
+                if not saw_function_call:
+                    saw_function_call = True
+                    yield "🔍 Looking up information...\n\n"
+                fc = part["functionCall"]
+                handler = function_handlers.get(fc["name"])
+                if handler is not None:
+                    tool_calls.append((part, asyncio.create_task(handler(**fc.get("args", {})))))
+            elif not saw_function_call and "text" in part:
+                # No function calls so far, so this is the answer itself
+                yield part["text"]
         
-        candidates = result.get("candidates", [])
-        if not candidates:
+        if not received_parts:
             yield "I'm unable to process that request."
             return
         
-        content = candidates[0].get("content", {})
-        parts = content.get("parts", [])
-        
-        # Check for function calls
-        function_calls = [p for p in parts if "functionCall" in p]
-        
-        if function_calls:
-            yield "🔍 Looking up information...\n\n"
+        if saw_function_call:
+            results = await asyncio.gather(*(task for _, task in tool_calls), return_exceptions=True)
             
-            # Execute function calls
+            # Append in the original order so model/function turns stay paired
             conversation = list(messages)
-            for fc_part in function_calls:
-                fc = fc_part["functionCall"]
-                func_name = fc["name"]
-                func_args = fc.get("args", {})
+            for (fc_part, _), func_result in zip(tool_calls, results):
+                if isinstance(func_result, BaseException):
+                    raise func_result
                 
-                if func_name in function_handlers:
-                    handler = function_handlers[func_name]
-                    func_result = await handler(**func_args)
-                    
-                    conversation.append({"role": "model", "parts": [fc_part]})
-                    conversation.append({
-                        "role": "function",
-                        "parts": [{
-                            "functionResponse": {
-                                "name": func_name,
-                                "response": {"result": func_result}
-                            }
-                        }]
-                    })
+                conversation.append({"role": "model", "parts": [fc_part]})
+                conversation.append({
+                    "role": "function",
+                    "parts": [{
+                        "functionResponse": {
+                            "name": fc_part["functionCall"]["name"],
+                            "response": {"result": func_result}
+                        }
+                    }]
+                })
             
             # Now stream the final response
-            config_no_functions = GeminiConfig(
-                temperature=0.2,
-                max_output_tokens=1024,
-                system_instruction=CHAT_SYSTEM_PROMPT
-            )
-            
-            async for chunk in client.generate_stream(conversation, config_no_functions):
+            async for chunk in client.generate_stream(conversation, _CHAT_ANSWER_GEMINI_CONFIG):
                 yield chunk
-        else:
-            # No function calls, stream directly
-            text_parts = [p.get("text", "") for p in parts if "text" in p]
-            for text in text_parts:
-                yield text
                 
     except Exception as e:
         yield f"\n⚠️ Error: {str(e)}\n"
         # Fall back to non-LLM response
         result = await _handle_with_fallback(message, tools)
         yield "\n" + result["answer"]
+    finally:
+        # Don't leave tools running if the turn failed or the client went away
+        for _, task in tool_calls:
+            task.cancel()
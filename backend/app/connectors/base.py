@@ -4,7 +4,8 @@ Base Connector Module
 Defines the abstract base class for all data connectors with standardized
 error handling and logging.
 """
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any, List, Tuple, TypedDict
 from abc import ABC, abstractmethod
 from ..core.logging import get_logger
 from ..core.exceptions import ConnectorError, ConnectorAuthRequiredError
@@ -12,8 +13,10 @@ from ..core.exceptions import ConnectorError, ConnectorAuthRequiredError
 logger = get_logger(__name__)
 
 
-class ConnectorResult(Dict):
+class ConnectorResult(TypedDict):
     """Standardized snippet result.
+    A typing-only schema: instances are plain dicts, and connectors may add
+    extra keys (e.g. "from" for emails).
     Fields:
     - id: record id
     - source: connector name
@@ -22,7 +25,12 @@ class ConnectorResult(Dict):
     - snippet: short text snippet
     - link: deep link to original record (provenance)
     """
-    pass
+    id: str
+    source: str
+    subject: str
+    timestamp: str
+    snippet: str
+    link: str
 
 
 class BaseConnector(ABC):
@@ -41,12 +49,21 @@ class BaseConnector(ABC):
         self.logger = get_logger(f"{__name__}.{self.name}")
 
     @abstractmethod
-    async def fetch_snippets(self, *, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    async def fetch_snippets(self, *, query: str, limit: int = 5) -> List[ConnectorResult]:
         """Fetch lightweight metadata snippets matching query.
         Return list of dicts with keys: id, subject, timestamp, snippet, link
         """
         raise NotImplementedError()
 
+    async def fetch_snippets_batch(self, queries: List[Tuple[str, int]]) -> List[List[ConnectorResult]]:
+        """Fetch snippets for several (query, limit) pairs, returned in query order.
+        Connectors with a native batch API should override this; the default runs
+        the queries concurrently.
+        """
+        return list(await asyncio.gather(
+            *(self.fetch_snippets(query=query, limit=limit) for query, limit in queries)
+        ))
+
     @abstractmethod
     async def get_record(self, record_id: str) -> Dict[str, Any]:
         """Fetch a specific record details (minimal fields)."""
@@ -0,0 +1,110 @@
+"""
+Shared HTTP plumbing for connectors
+Pooled per-service clients and a retrying transport for throttled responses.
+"""
+import asyncio
+import random
+from typing import Callable, Collection, Optional
+
+import httpx
+
+from ..core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Rate-limited requests are rejected before the service processes them, so this
+# status is retried even for requests that aren't safe to replay
+THROTTLED_STATUS_CODES = frozenset({429})
+
+
+def retry_delay(response: httpx.Response, attempt: int, backoff_seconds: float, max_backoff_seconds: float) -> float:
+    """Seconds to wait before a retry: Retry-After if sent, else full-jitter backoff."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), max_backoff_seconds)
+        except ValueError:
+            pass
+    return random.uniform(0, min(backoff_seconds * (2 ** attempt), max_backoff_seconds))
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that retries throttled or transient responses.
+    
+    Requests for which is_replay_safe returns False (e.g. sending mail) are
+    only retried on 429, since a gateway 503 may come after the work was done.
+    With a semaphore, at most its value of requests are in flight at once; the
+    slot is released while waiting to retry.
+    """
+    
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        *,
+        service_name: str,
+        retry_status_codes: Collection[int],
+        max_retries: int,
+        backoff_seconds: float,
+        max_backoff_seconds: float,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        is_replay_safe: Callable[[httpx.Request], bool] = lambda request: True
+    ):
+        self._transport = transport
+        self._service_name = service_name
+        self._retry_status_codes = frozenset(retry_status_codes)
+        self._max_retries = max_retries
+        self._backoff_seconds = backoff_seconds
+        self._max_backoff_seconds = max_backoff_seconds
+        self._semaphore = semaphore
+        self._is_replay_safe = is_replay_safe
+    
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        if self._semaphore is None:
+            return await self._transport.handle_async_request(request)
+        async with self._semaphore:
+            return await self._transport.handle_async_request(request)
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        retry_status_codes = (
+            self._retry_status_codes if self._is_replay_safe(request)
+            else self._retry_status_codes & THROTTLED_STATUS_CODES
+        )
+        for attempt in range(self._max_retries):
+            response = await self._send(request)
+            if response.status_code not in retry_status_codes:
+                return response
+            delay = retry_delay(response, attempt, self._backoff_seconds, self._max_backoff_seconds)
+            await response.aclose()
+            logger.debug(
+                f"Retrying {self._service_name} request",
+                extra={"status_code": response.status_code, "attempt": attempt + 1, "delay": delay}
+            )
+            await asyncio.sleep(delay)
+        return await self._send(request)
+    
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class SharedHTTPClient:
+    """Lazily created httpx.AsyncClient shared by every connector of one service.
+    
+    Connectors are built per request, so the pool lives at module level to keep
+    connections to the service alive between them.
+    """
+    
+    def __init__(self, factory: Callable[[], httpx.AsyncClient]):
+        self._factory = factory
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def get(self) -> httpx.AsyncClient:
+        """Get or create the shared client."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._factory()
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared client; the next get() creates a new one."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
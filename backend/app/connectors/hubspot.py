@@ -3,10 +3,16 @@ HubSpot CRM Connector
 Provides read-only access to HubSpot data for client and deal information.
 """
 import os
+import asyncio
+import functools
 import httpx
-from typing import Dict, Any, List, Optional
-from .base import BaseConnector
+import orjson
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable, TypedDict
+from .base import BaseConnector, ConnectorResult
+from .http import RetryTransport, SharedHTTPClient
 from ..core.logging import get_logger
+from ..core.cache import MISSING, SingleFlight, TTLCache
 
 logger = get_logger(__name__)
 
@@ -19,6 +25,201 @@ HUBSPOT_REDIRECT_URI = os.getenv("HUBSPOT_REDIRECT_URI", "http://localhost:8000/
 # HubSpot API base URL
 HUBSPOT_API_BASE = "https://api.hubapi.com"
 
+# Company records are cached per connector for this long, so repeated
+# get_record calls within a request reuse one fetch
+RECORD_CACHE_TTL_SECONDS = 60
+MAX_CACHED_RECORDS = 512
+
+# Max record IDs accepted by one /batch/read request
+MAX_BATCH_READ_INPUTS = 100
+
+# Largest page HubSpot serves per request (list endpoints / search). Larger
+# limits are rejected with a 400, so requests are clamped to keep each
+# response bounded instead of falling back to mock data.
+MAX_LIST_PAGE_SIZE = 100
+MAX_SEARCH_PAGE_SIZE = 200
+
+# Properties requested per object type, fixed at import. GET endpoints take
+# them comma-joined, so those strings are prebuilt too.
+COMPANY_SEARCH_PROPERTIES = ("name", "industry", "phone", "website", "city", "state")
+COMPANY_RECORD_PROPERTIES = ",".join(COMPANY_SEARCH_PROPERTIES + ("annualrevenue", "description"))
+COMPANY_LIST_PROPERTIES = ",".join(COMPANY_SEARCH_PROPERTIES + ("annualrevenue", "createdate"))
+COMPANY_NAME_PROPERTIES = ("name",)
+CONTACT_PROPERTIES = ("firstname", "lastname", "email", "phone", "jobtitle", "company")
+CONTACT_LIST_PROPERTIES = ",".join(CONTACT_PROPERTIES)
+NOTE_PROPERTIES = ("hs_note_body", "hs_timestamp", "hubspot_owner_id")
+
+# Deal search shapes. Bodies are encoded once per distinct
+# (limit, properties, filters) and reused; renewal date filters change daily.
+DEAL_SEARCH_PROPERTIES = (
+    "dealname", "amount", "dealstage", "closedate",
+    "pipeline", "hubspot_owner_id", "description"
+)
+RENEWAL_SEARCH_PROPERTIES = (
+    "dealname", "amount", "dealstage", "closedate",
+    "pipeline", "hubspot_owner_id", "hs_deal_stage_probability"
+)
+MAX_CACHED_SEARCH_BODIES = 64
+_CLOSEDATE_ASCENDING = ({"propertyName": "closedate", "direction": "ASCENDING"},)
+
+
+@functools.lru_cache(maxsize=MAX_CACHED_SEARCH_BODIES)
+def _deal_search_body(
+    limit: int,
+    properties: Tuple[str, ...],
+    filters: Tuple[Tuple[str, str, str], ...]
+) -> bytes:
+    """Encode a closedate-sorted deal search body from (property, operator, value) filters."""
+    body: Dict[str, Any] = {
+        "limit": min(limit, MAX_SEARCH_PAGE_SIZE),
+        "properties": properties,
+        "sorts": _CLOSEDATE_ASCENDING
+    }
+    if filters:
+        body["filterGroups"] = [{
+            "filters": [
+                {"propertyName": name, "operator": operator, "value": value}
+                for name, operator, value in filters
+            ]
+        }]
+    return orjson.dumps(body)
+
+
+# Portal-less deep link prefixes for the object types this connector links to
+_RECORD_LINK_PREFIXES = {
+    object_type: f"https://app.hubspot.com/contacts/{object_type}/"
+    for object_type in ("company", "deal", "contact", "note")
+}
+
+# Lookup values cycled through by the mock data generators
+_MOCK_INDUSTRIES = ("Manufacturing", "Technology", "Healthcare", "Finance", "Retail")
+_MOCK_STAGES = ("Appointment Scheduled", "Qualified", "Proposal", "Negotiation", "Closed Won")
+_MOCK_TITLES = ("CFO", "Risk Manager", "CEO", "Operations Director", "VP Finance")
+
+# Rate-limited and transient gateway responses are retried with jittered
+# exponential backoff before callers see them (and fall back to mock data);
+# failed connection attempts are retried by the connection pool itself
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+MAX_RETRY_BACKOFF_SECONDS = 8.0
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Build the HubSpot HTTP client (see _http)."""
+    # HTTP/2 multiplexes concurrent calls (e.g. batch chunks) over one connection;
+    # every request is a read with a bytes body, so replaying it is safe
+    return httpx.AsyncClient(
+        transport=RetryTransport(
+            httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=MAX_RETRIES,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=60)
+            ),
+            service_name="HubSpot",
+            retry_status_codes=RETRY_STATUS_CODES,
+            max_retries=MAX_RETRIES,
+            backoff_seconds=RETRY_BACKOFF_SECONDS,
+            max_backoff_seconds=MAX_RETRY_BACKOFF_SECONDS
+        )
+    )
+
+
+_http = SharedHTTPClient(_create_http_client)
+_get_http_client = _http.get
+close_http_client = _http.aclose
+
+
+def _to_float(value: Any) -> float:
+    """Parse a HubSpot numeric property; missing, empty or malformed values are 0.0."""
+    try:
+        return float(value) if value else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# Result schemas. Like ConnectorResult these are typing-only: instances are
+# plain dicts, so callers and JSON responses are unaffected.
+class CompanyRecord(TypedDict):
+    """Company detail returned by get_record."""
+    id: str
+    source: str
+    type: str
+    name: str
+    industry: str
+    phone: str
+    website: str
+    city: str
+    state: str
+    annual_revenue: Any
+    description: str
+    link: str
+
+
+class CompanySummary(TypedDict):
+    """Company row returned by get_companies."""
+    id: str
+    source: str
+    name: str
+    industry: str
+    phone: str
+    website: str
+    city: str
+    state: str
+    annual_revenue: Any
+    created_date: str
+    link: str
+
+
+class DealRecord(TypedDict):
+    """Deal row returned by get_deals."""
+    id: str
+    source: str
+    name: str
+    amount: float
+    stage: str
+    close_date: str
+    pipeline: str
+    client_name: str
+    description: str
+    link: str
+
+
+class RenewalRecord(TypedDict):
+    """Renewal row returned by get_renewals."""
+    id: str
+    source: str
+    policy_number: str
+    client_name: str
+    premium_at_risk: float
+    expiry_date: str
+    days_to_expiry: int
+    stage: str
+    probability: float
+    pipeline: str
+    link: str
+
+
+class ContactRecord(TypedDict):
+    """Contact row returned by get_contacts."""
+    id: str
+    source: str
+    name: str
+    email: str
+    phone: str
+    title: str
+    company: str
+    link: str
+
+
+class NoteRecord(TypedDict):
+    """Note row returned by get_notes_for_deal."""
+    id: str
+    source: str
+    content: str
+    timestamp: str
+    link: str
+
 
 class HubSpotConnector(BaseConnector):
     """
@@ -39,6 +240,16 @@ class HubSpotConnector(BaseConnector):
         self.access_token: Optional[str] = settings.get("access_token")
         self.api_base = HUBSPOT_API_BASE
         self.timeout = settings.get("timeout", 30.0)
+        
+        # Authorization headers, built once per access token and reused by every request
+        self._headers: Optional[Dict[str, str]] = None
+        self._headers_token: Optional[str] = None
+        
+        # Raw company records (TTL/LRU, see _cached)
+        self._record_cache = TTLCache(RECORD_CACHE_TTL_SECONDS, MAX_CACHED_RECORDS)
+        # In-flight fetches keyed by (cache, key); concurrent callers share one fetch
+        self._inflight = SingleFlight()
+        
         logger.debug(
             "Initialized HubSpot connector",
             extra={"has_token": bool(self.access_token)}
@@ -46,22 +257,51 @@ class HubSpotConnector(BaseConnector):
     
     def _get_headers(self) -> Dict[str, str]:
         """Get authorization headers."""
-        if not self.access_token:
-            logger.error("HubSpot access token not configured")
-            raise ValueError("Access token not configured. User must authenticate via OAuth.")
-        return {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-        }
+        if self._headers_token != self.access_token or self._headers is None:
+            if not self.access_token:
+                logger.error("HubSpot access token not configured")
+                raise ValueError("Access token not configured. User must authenticate via OAuth.")
+            self._headers = {
+                "Authorization": f"Bearer {self.access_token}",
+                "Content-Type": "application/json",
+            }
+            self._headers_token = self.access_token
+        return self._headers
+    
+    async def _cached(
+        self,
+        cache: TTLCache,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return a fresh cached value for key, or await fetch() and cache it unless it is None.
+        
+        Concurrent misses for the same key share one fetch; cancelling one caller
+        doesn't affect the others.
+        """
+        value = cache.get(key)
+        if value is not MISSING:
+            return value
+        
+        async def load() -> Any:
+            value = await fetch()
+            if value is not None:
+                cache.set(key, value)
+            return value
+        
+        return await self._inflight.run((id(cache), key), load)
     
     def _build_record_link(self, object_type: str, record_id: str, portal_id: str = "") -> str:
         """Build HubSpot deep link for a record."""
         # HubSpot deep links require portal ID
         if portal_id:
             return f"https://app.hubspot.com/contacts/{portal_id}/{object_type}/{record_id}"
-        return f"https://app.hubspot.com/contacts/{object_type}/{record_id}"
+        prefix = _RECORD_LINK_PREFIXES.get(object_type)
+        if prefix is None:
+            return f"https://app.hubspot.com/contacts/{object_type}/{record_id}"
+        return prefix + str(record_id)
     
-    async def fetch_snippets(self, *, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    async def fetch_snippets(self, *, query: str, limit: int = 5) -> List[ConnectorResult]:
         """
         Search across HubSpot objects for matching records.
         """
@@ -78,23 +318,24 @@ class HubSpotConnector(BaseConnector):
             # Search companies
             search_body = {
                 "query": query,
-                "limit": limit,
-                "properties": ["name", "industry", "phone", "website", "city", "state"]
+                "limit": min(limit, MAX_SEARCH_PAGE_SIZE),
+                "properties": COMPANY_SEARCH_PROPERTIES
             }
             
             logger.debug("Searching HubSpot companies", extra={"query": query})
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_base}/crm/v3/objects/companies/search",
-                    headers=self._get_headers(),
-                    json=search_body
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = _get_http_client()
+            response = await client.post(
+                f"{self.api_base}/crm/v3/objects/companies/search",
+                headers=self._get_headers(),
+                content=orjson.dumps(search_body),
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
             
             results = []
-            for record in data.get("results", [])[:limit]:
+            for record in data.get("results", ()):
                 props = record.get("properties", {})
                 results.append({
                     "id": record["id"],
@@ -119,7 +360,7 @@ class HubSpotConnector(BaseConnector):
             )
             return self._mock_company_snippets(query, limit)
     
-    async def get_record(self, record_id: str) -> Dict[str, Any]:
+    async def get_record(self, record_id: str) -> CompanyRecord:
         """Get a specific company by ID."""
         logger.info(f"Fetching HubSpot record", extra={"record_id": record_id})
         
@@ -128,16 +369,9 @@ class HubSpotConnector(BaseConnector):
             return self._mock_company_record(record_id)
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.api_base}/crm/v3/objects/companies/{record_id}",
-                    headers=self._get_headers(),
-                    params={
-                        "properties": "name,industry,phone,website,city,state,annualrevenue,description"
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
+            data = await self._cached(
+                self._record_cache, record_id, lambda: self._fetch_company(record_id)
+            )
             
             props = data.get("properties", {})
             logger.info(f"Retrieved HubSpot company record", extra={"record_id": record_id})
@@ -163,7 +397,23 @@ class HubSpotConnector(BaseConnector):
             )
             return self._mock_company_record(record_id)
     
-    async def get_companies(self, limit: int = 20) -> List[Dict[str, Any]]:
+    async def _fetch_company(self, record_id: str) -> Dict[str, Any]:
+        """Fetch a raw company record."""
+        client = _get_http_client()
+        response = await client.get(
+            f"{self.api_base}/crm/v3/objects/companies/{record_id}",
+            headers=self._get_headers(),
+            params={
+                "properties": COMPANY_RECORD_PROPERTIES
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        # Cache only what get_record reads, not the full API envelope
+        return {"id": data["id"], "properties": data.get("properties", {})}
+    
+    async def get_companies(self, limit: int = 20) -> List[CompanySummary]:
         """Get client companies."""
         logger.info(f"Fetching HubSpot companies", extra={"limit": limit})
         
@@ -172,34 +422,35 @@ class HubSpotConnector(BaseConnector):
             return self._mock_companies(limit)
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.api_base}/crm/v3/objects/companies",
-                    headers=self._get_headers(),
-                    params={
-                        "limit": limit,
-                        "properties": "name,industry,phone,website,city,state,annualrevenue,createdate"
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = _get_http_client()
+            response = await client.get(
+                f"{self.api_base}/crm/v3/objects/companies",
+                headers=self._get_headers(),
+                params={
+                    "limit": min(limit, MAX_LIST_PAGE_SIZE),
+                    "properties": COMPANY_LIST_PROPERTIES
+                },
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
             
-            companies = [
-                {
+            companies = []
+            for record in data.get("results", []):
+                props = record.get("properties", {})
+                companies.append({
                     "id": record["id"],
                     "source": self.name,
-                    "name": record.get("properties", {}).get("name", ""),
-                    "industry": record.get("properties", {}).get("industry", ""),
-                    "phone": record.get("properties", {}).get("phone", ""),
-                    "website": record.get("properties", {}).get("website", ""),
-                    "city": record.get("properties", {}).get("city", ""),
-                    "state": record.get("properties", {}).get("state", ""),
-                    "annual_revenue": record.get("properties", {}).get("annualrevenue", 0),
-                    "created_date": record.get("properties", {}).get("createdate", ""),
+                    "name": props.get("name", ""),
+                    "industry": props.get("industry", ""),
+                    "phone": props.get("phone", ""),
+                    "website": props.get("website", ""),
+                    "city": props.get("city", ""),
+                    "state": props.get("state", ""),
+                    "annual_revenue": props.get("annualrevenue", 0),
+                    "created_date": props.get("createdate", ""),
                     "link": self._build_record_link("company", record["id"])
-                }
-                for record in data.get("results", [])
-            ]
+                })
             
             logger.info(f"Retrieved {len(companies)} HubSpot companies")
             return companies
@@ -216,7 +467,7 @@ class HubSpotConnector(BaseConnector):
         stage: Optional[str] = None,
         days_to_close: Optional[int] = None,
         limit: int = 20
-    ) -> List[Dict[str, Any]]:
+    ) -> List[DealRecord]:
         """
         Get deals (policies/opportunities).
         
@@ -239,59 +490,44 @@ class HubSpotConnector(BaseConnector):
             return self._mock_deals(limit)
         
         try:
-            # Build filter groups if needed
+            # Build filters if needed
             filters = []
             if stage:
-                filters.append({
-                    "propertyName": "dealstage",
-                    "operator": "EQ",
-                    "value": stage
-                })
+                filters.append(("dealstage", "EQ", stage))
             
             if days_to_close:
-                from datetime import datetime, timedelta
                 future_date = (datetime.now() + timedelta(days=days_to_close)).strftime("%Y-%m-%d")
-                filters.append({
-                    "propertyName": "closedate",
-                    "operator": "LTE",
-                    "value": future_date
-                })
+                filters.append(("closedate", "LTE", future_date))
             
-            search_body = {
-                "limit": limit,
-                "properties": [
-                    "dealname", "amount", "dealstage", "closedate", 
-                    "pipeline", "hubspot_owner_id", "description"
-                ],
-                "sorts": [{"propertyName": "closedate", "direction": "ASCENDING"}]
-            }
+            search_body = _deal_search_body(limit, DEAL_SEARCH_PROPERTIES, tuple(filters))
             
             logger.debug("Searching HubSpot deals", extra={"filter_count": len(filters)})
             
-            if filters:
-                search_body["filterGroups"] = [{"filters": filters}]
+            client = _get_http_client()
+            response = await client.post(
+                f"{self.api_base}/crm/v3/objects/deals/search",
+                headers=self._get_headers(),
+                content=search_body,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_base}/crm/v3/objects/deals/search",
-                    headers=self._get_headers(),
-                    json=search_body
-                )
-                response.raise_for_status()
-                data = response.json()
+            records = data.get("results", [])
+            
+            # Resolve associated company names in two batch calls
+            company_names = await self._get_deal_company_names([record["id"] for record in records])
             
             deals = []
-            for record in data.get("results", []):
+            for record in records:
                 props = record.get("properties", {})
-                
-                # Get associated company
-                company_name = await self._get_deal_company(record["id"])
+                company_name = company_names.get(str(record["id"]), "")
                 
                 deals.append({
                     "id": record["id"],
                     "source": self.name,
                     "name": props.get("dealname", ""),
-                    "amount": float(props.get("amount", 0) or 0),
+                    "amount": _to_float(props.get("amount")),
                     "stage": props.get("dealstage", ""),
                     "close_date": props.get("closedate", ""),
                     "pipeline": props.get("pipeline", ""),
@@ -305,28 +541,39 @@ class HubSpotConnector(BaseConnector):
         except httpx.HTTPError:
             return self._mock_deals(limit)
     
-    async def _get_deal_company(self, deal_id: str) -> str:
-        """Get the company name associated with a deal."""
+    async def _get_deal_company_names(self, deal_ids: List[str]) -> Dict[str, str]:
+        """Map deal ids to their first associated company's name (deals without one are omitted)."""
+        if not deal_ids:
+            return {}
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.api_base}/crm/v3/objects/deals/{deal_id}/associations/companies",
-                    headers=self._get_headers()
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    results = data.get("results", [])
-                    if results:
-                        company_id = results[0].get("id")
-                        if company_id:
-                            company = await self.get_record(company_id)
-                            return company.get("name", "")
-            return ""
+            # Deal -> company ids in one association batch read
+            associations = await self._post_batch_inputs(
+                f"{self.api_base}/crm/v3/associations/deals/companies/batch/read",
+                deal_ids,
+                {}
+            )
+            deal_companies = {}
+            for association in associations:
+                to = association.get("to") or []
+                if to and to[0].get("id"):
+                    deal_companies[str(association["from"]["id"])] = str(to[0]["id"])
+            
+            if not deal_companies:
+                return {}
+            
+            # Company names in one batch read, deduplicated across deals
+            companies = await self._batch_read("companies", list(dict.fromkeys(deal_companies.values())), COMPANY_NAME_PROPERTIES)
+            names = {str(company["id"]): company.get("properties", {}).get("name", "") for company in companies}
+            
+            return {
+                deal_id: names[company_id]
+                for deal_id, company_id in deal_companies.items()
+                if company_id in names
+            }
         except httpx.HTTPError:
-            return ""
+            return {}
     
-    async def get_renewals(self, days_ahead: int = 90, limit: int = 20) -> List[Dict[str, Any]]:
+    async def get_renewals(self, days_ahead: int = 90, limit: int = 20) -> List[RenewalRecord]:
         """
         Get upcoming renewals.
         
@@ -337,63 +584,49 @@ class HubSpotConnector(BaseConnector):
             return self._mock_renewals(days_ahead, limit)
         
         try:
-            from datetime import datetime, timedelta
+            now = datetime.now()
+            future_date = (now + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
             
-            future_date = (datetime.now() + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
+            search_body = _deal_search_body(limit, RENEWAL_SEARCH_PROPERTIES, (
+                ("closedate", "LTE", future_date),
+                ("closedate", "GTE", now.strftime("%Y-%m-%d")),
+            ))
             
-            search_body = {
-                "limit": limit,
-                "properties": [
-                    "dealname", "amount", "dealstage", "closedate",
-                    "pipeline", "hubspot_owner_id", "hs_deal_stage_probability"
-                ],
-                "filterGroups": [{
-                    "filters": [
-                        {
-                            "propertyName": "closedate",
-                            "operator": "LTE",
-                            "value": future_date
-                        },
-                        {
-                            "propertyName": "closedate",
-                            "operator": "GTE",
-                            "value": datetime.now().strftime("%Y-%m-%d")
-                        }
-                    ]
-                }],
-                "sorts": [{"propertyName": "closedate", "direction": "ASCENDING"}]
-            }
+            client = _get_http_client()
+            response = await client.post(
+                f"{self.api_base}/crm/v3/objects/deals/search",
+                headers=self._get_headers(),
+                content=search_body,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_base}/crm/v3/objects/deals/search",
-                    headers=self._get_headers(),
-                    json=search_body
-                )
-                response.raise_for_status()
-                data = response.json()
+            records = data.get("results", [])
+            
+            # Resolve associated company names in two batch calls
+            company_names = await self._get_deal_company_names([record["id"] for record in records])
             
+            today = date.today()
             renewals = []
-            for record in data.get("results", []):
+            for record in records:
                 props = record.get("properties", {})
-                
-                # Get associated company
-                company_name = await self._get_deal_company(record["id"])
+                company_name = company_names.get(str(record["id"]), "")
                 
                 # Calculate days to expiry
                 close_date = props.get("closedate", "")
-                days_to_expiry = self._calculate_days_to_date(close_date)
+                days_to_expiry = self._calculate_days_to_date(close_date, today)
                 
                 renewals.append({
                     "id": record["id"],
                     "source": self.name,
                     "policy_number": props.get("dealname", ""),
                     "client_name": company_name,
-                    "premium_at_risk": float(props.get("amount", 0) or 0),
+                    "premium_at_risk": _to_float(props.get("amount")),
                     "expiry_date": close_date[:10] if close_date else "",
                     "days_to_expiry": days_to_expiry,
                     "stage": props.get("dealstage", ""),
-                    "probability": float(props.get("hs_deal_stage_probability", 0) or 0),
+                    "probability": _to_float(props.get("hs_deal_stage_probability")),
                     "pipeline": props.get("pipeline", ""),
                     "link": self._build_record_link("deal", record["id"])
                 })
@@ -403,150 +636,198 @@ class HubSpotConnector(BaseConnector):
         except httpx.HTTPError:
             return self._mock_renewals(days_ahead, limit)
     
-    def _calculate_days_to_date(self, date_str: str) -> int:
-        """Calculate days from today to a date string."""
+    def _calculate_days_to_date(self, date_str: str, today: Optional[date] = None) -> int:
+        """Calculate days from today (or the given date) to a date string."""
         if not date_str:
             return 999
         try:
-            from datetime import datetime, date
-            # HubSpot dates may include time
-            if "T" in date_str:
-                date_str = date_str.split("T")[0]
-            target = datetime.strptime(date_str, "%Y-%m-%d").date()
-            return (target - date.today()).days
+            # HubSpot dates may include time; the date part is always YYYY-MM-DD
+            target = date.fromisoformat(date_str[:10])
+            return (target - (today or date.today())).days
         except ValueError:
             return 999
     
-    async def get_contacts(self, company_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    async def get_contacts(self, company_id: Optional[str] = None, limit: int = 20) -> List[ContactRecord]:
         """Get contacts, optionally filtered by company."""
         if not self.access_token:
             return self._mock_contacts(limit)
         
         try:
             if company_id:
-                # Get contacts associated with company
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.get(
-                        f"{self.api_base}/crm/v3/objects/companies/{company_id}/associations/contacts",
-                        headers=self._get_headers()
-                    )
-                    
-                    if response.status_code != 200:
-                        return self._mock_contacts(limit)
-                    
-                    assoc_data = response.json()
-                    contact_ids = [r["id"] for r in assoc_data.get("results", [])]
-                
-                if not contact_ids:
-                    return []
+                # Search contacts by company association in a single request
+                client = _get_http_client()
+                response = await client.post(
+                    f"{self.api_base}/crm/v3/objects/contacts/search",
+                    headers=self._get_headers(),
+                    content=orjson.dumps({
+                        "limit": min(limit, MAX_SEARCH_PAGE_SIZE),
+                        "properties": CONTACT_PROPERTIES,
+                        "filterGroups": [{
+                            "filters": [{
+                                "propertyName": "associations.company",
+                                "operator": "EQ",
+                                "value": company_id
+                            }]
+                        }]
+                    }),
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+                records = orjson.loads(response.content).get("results", [])
                 
-                # Fetch contact details
                 contacts = []
-                for cid in contact_ids[:limit]:
-                    response = await client.get(
-                        f"{self.api_base}/crm/v3/objects/contacts/{cid}",
-                        headers=self._get_headers(),
-                        params={"properties": "firstname,lastname,email,phone,jobtitle,company"}
-                    )
-                    if response.status_code == 200:
-                        data = response.json()
-                        props = data.get("properties", {})
-                        contacts.append({
-                            "id": data["id"],
-                            "source": self.name,
-                            "name": f"{props.get('firstname', '')} {props.get('lastname', '')}".strip(),
-                            "email": props.get("email", ""),
-                            "phone": props.get("phone", ""),
-                            "title": props.get("jobtitle", ""),
-                            "company": props.get("company", ""),
-                            "link": self._build_record_link("contact", data["id"])
-                        })
+                for data in records:
+                    props = data.get("properties", {})
+                    contacts.append({
+                        "id": data["id"],
+                        "source": self.name,
+                        "name": f"{props.get('firstname', '')} {props.get('lastname', '')}".strip(),
+                        "email": props.get("email", ""),
+                        "phone": props.get("phone", ""),
+                        "title": props.get("jobtitle", ""),
+                        "company": props.get("company", ""),
+                        "link": self._build_record_link("contact", data["id"])
+                    })
                 
                 return contacts
             
             else:
                 # Get all contacts
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.get(
-                        f"{self.api_base}/crm/v3/objects/contacts",
-                        headers=self._get_headers(),
-                        params={
-                            "limit": limit,
-                            "properties": "firstname,lastname,email,phone,jobtitle,company"
-                        }
-                    )
-                    response.raise_for_status()
-                    data = response.json()
+                client = _get_http_client()
+                response = await client.get(
+                    f"{self.api_base}/crm/v3/objects/contacts",
+                    headers=self._get_headers(),
+                    params={
+                        "limit": min(limit, MAX_LIST_PAGE_SIZE),
+                        "properties": CONTACT_LIST_PROPERTIES
+                    },
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+                data = orjson.loads(response.content)
                 
-                return [
-                    {
+                contacts = []
+                for record in data.get("results", []):
+                    props = record.get("properties", {})
+                    contacts.append({
                         "id": record["id"],
                         "source": self.name,
-                        "name": f"{record.get('properties', {}).get('firstname', '')} {record.get('properties', {}).get('lastname', '')}".strip(),
-                        "email": record.get("properties", {}).get("email", ""),
-                        "phone": record.get("properties", {}).get("phone", ""),
-                        "title": record.get("properties", {}).get("jobtitle", ""),
-                        "company": record.get("properties", {}).get("company", ""),
+                        "name": f"{props.get('firstname', '')} {props.get('lastname', '')}".strip(),
+                        "email": props.get("email", ""),
+                        "phone": props.get("phone", ""),
+                        "title": props.get("jobtitle", ""),
+                        "company": props.get("company", ""),
                         "link": self._build_record_link("contact", record["id"])
-                    }
-                    for record in data.get("results", [])
-                ]
+                    })
+                
+                return contacts
             
         except httpx.HTTPError:
             return self._mock_contacts(limit)
     
-    async def get_notes_for_deal(self, deal_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    async def get_notes_for_deal(self, deal_id: str, limit: int = 10) -> List[NoteRecord]:
         """Get notes/activities associated with a deal."""
         if not self.access_token:
             return self._mock_notes(limit)
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Get associated notes
-                response = await client.get(
-                    f"{self.api_base}/crm/v3/objects/deals/{deal_id}/associations/notes",
-                    headers=self._get_headers()
-                )
-                
-                if response.status_code != 200:
-                    return []
-                
-                assoc_data = response.json()
-                note_ids = [r["id"] for r in assoc_data.get("results", [])]
+            client = _get_http_client()
+            
+            # Get associated notes
+            response = await client.get(
+                f"{self.api_base}/crm/v3/objects/deals/{deal_id}/associations/notes",
+                headers=self._get_headers(),
+                timeout=self.timeout
+            )
+            
+            if response.status_code != 200:
+                return []
+            
+            assoc_data = orjson.loads(response.content)
+            note_ids = [r["id"] for r in assoc_data.get("results", [])]
             
             if not note_ids:
                 return []
             
-            # Fetch note details
+            # Fetch note details in one batch read
+            records = await self._batch_read(
+                "notes",
+                note_ids[:limit],
+                NOTE_PROPERTIES
+            )
+            
             notes = []
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                for nid in note_ids[:limit]:
-                    response = await client.get(
-                        f"{self.api_base}/crm/v3/objects/notes/{nid}",
-                        headers=self._get_headers(),
-                        params={"properties": "hs_note_body,hs_timestamp,hubspot_owner_id"}
-                    )
-                    if response.status_code == 200:
-                        data = response.json()
-                        props = data.get("properties", {})
-                        notes.append({
-                            "id": data["id"],
-                            "source": self.name,
-                            "content": props.get("hs_note_body", ""),
-                            "timestamp": props.get("hs_timestamp", ""),
-                            "link": self._build_record_link("note", data["id"])
-                        })
+            for data in records:
+                props = data.get("properties", {})
+                notes.append({
+                    "id": data["id"],
+                    "source": self.name,
+                    "content": props.get("hs_note_body", ""),
+                    "timestamp": props.get("hs_timestamp", ""),
+                    "link": self._build_record_link("note", data["id"])
+                })
             
             return notes
             
         except httpx.HTTPError:
             return self._mock_notes(limit)
     
+    async def _batch_read(
+        self,
+        object_type: str,
+        record_ids: List[str],
+        properties: Tuple[str, ...]
+    ) -> List[Dict[str, Any]]:
+        """Read records by ID via /batch/read, in ID order; unreadable IDs are skipped."""
+        records = await self._post_batch_inputs(
+            f"{self.api_base}/crm/v3/objects/{object_type}/batch/read",
+            record_ids,
+            {"properties": properties}
+        )
+        records_by_id = {str(record["id"]): record for record in records}
+        return [records_by_id[str(rid)] for rid in record_ids if str(rid) in records_by_id]
+    
+    async def _post_batch_inputs(
+        self,
+        url: str,
+        ids: List[str],
+        body: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """POST ids to a batch endpoint in chunks of MAX_BATCH_READ_INPUTS and concatenate the results."""
+        client = _get_http_client()
+        headers = self._get_headers()
+        
+        # A failed chunk cancels its siblings; callers expect the plain error
+        # (e.g. httpx.HTTPError), not the ExceptionGroup wrapping it
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(client.post(
+                        url,
+                        headers=headers,
+                        content=orjson.dumps({
+                            **body,
+                            "inputs": [{"id": rid} for rid in ids[i:i + MAX_BATCH_READ_INPUTS]]
+                        }),
+                        timeout=self.timeout
+                    ))
+                    for i in range(0, len(ids), MAX_BATCH_READ_INPUTS)
+                ]
+        except ExceptionGroup as eg:
+            raise eg.exceptions[0]
+        
+        results = []
+        for response in (task.result() for task in tasks):
+            # 207 Multi-Status means some IDs could not be read
+            if response.status_code in (200, 207):
+                results.extend(orjson.loads(response.content).get("results", []))
+        return results
+    
     # =========================================================================
     # Mock data methods for testing without real OAuth
     # =========================================================================
     
-    def _mock_company_snippets(self, query: str, limit: int) -> List[Dict[str, Any]]:
+    def _mock_company_snippets(self, query: str, limit: int) -> List[ConnectorResult]:
         """Return mock company search results."""
         return [
             {
@@ -555,13 +836,13 @@ class HubSpotConnector(BaseConnector):
                 "type": "Company",
                 "subject": f"Company matching {query} #{i}",
                 "timestamp": "2025-12-01T10:00:00Z",
-                "snippet": f"Industry: Manufacturing | New York, NY",
+                "snippet": "Industry: Manufacturing | New York, NY",
                 "link": f"https://app.hubspot.com/contacts/company/hs-company-{i}"
             }
             for i in range(1, min(limit + 1, 6))
         ]
     
-    def _mock_company_record(self, record_id: str) -> Dict[str, Any]:
+    def _mock_company_record(self, record_id: str) -> CompanyRecord:
         """Return mock company record."""
         return {
             "id": record_id,
@@ -578,15 +859,14 @@ class HubSpotConnector(BaseConnector):
             "link": f"https://app.hubspot.com/contacts/company/{record_id}"
         }
     
-    def _mock_companies(self, limit: int) -> List[Dict[str, Any]]:
+    def _mock_companies(self, limit: int) -> List[CompanySummary]:
         """Return mock companies list."""
-        industries = ["Manufacturing", "Technology", "Healthcare", "Finance", "Retail"]
         return [
             {
                 "id": f"hs-company-{i}",
                 "source": self.name,
                 "name": f"Client Company {i}",
-                "industry": industries[i % len(industries)],
+                "industry": _MOCK_INDUSTRIES[i % len(_MOCK_INDUSTRIES)],
                 "phone": f"+1-555-010{i}",
                 "website": f"https://company{i}.example.com",
                 "city": "New York",
@@ -598,16 +878,15 @@ class HubSpotConnector(BaseConnector):
             for i in range(1, min(limit + 1, 11))
         ]
     
-    def _mock_deals(self, limit: int) -> List[Dict[str, Any]]:
+    def _mock_deals(self, limit: int) -> List[DealRecord]:
         """Return mock deals."""
-        stages = ["Appointment Scheduled", "Qualified", "Proposal", "Negotiation", "Closed Won"]
         return [
             {
                 "id": f"hs-deal-{i}",
                 "source": self.name,
                 "name": f"Policy Deal {i}",
                 "amount": 50000 * i,
-                "stage": stages[i % len(stages)],
+                "stage": _MOCK_STAGES[i % len(_MOCK_STAGES)],
                 "close_date": f"2026-0{min(i, 9)}-15",
                 "pipeline": "default",
                 "client_name": f"Client Company {i}",
@@ -617,7 +896,7 @@ class HubSpotConnector(BaseConnector):
             for i in range(1, min(limit + 1, 11))
         ]
     
-    def _mock_renewals(self, days_ahead: int, limit: int) -> List[Dict[str, Any]]:
+    def _mock_renewals(self, days_ahead: int, limit: int) -> List[RenewalRecord]:
         """Return mock renewals."""
         return [
             {
@@ -636,9 +915,8 @@ class HubSpotConnector(BaseConnector):
             for i in range(1, min(limit + 1, 6))
         ]
     
-    def _mock_contacts(self, limit: int) -> List[Dict[str, Any]]:
+    def _mock_contacts(self, limit: int) -> List[ContactRecord]:
         """Return mock contacts."""
-        titles = ["CFO", "Risk Manager", "CEO", "Operations Director", "VP Finance"]
         return [
             {
                 "id": f"hs-contact-{i}",
@@ -646,14 +924,14 @@ class HubSpotConnector(BaseConnector):
                 "name": f"Contact Person {i}",
                 "email": f"contact{i}@example.com",
                 "phone": f"+1-555-020{i}",
-                "title": titles[i % len(titles)],
+                "title": _MOCK_TITLES[i % len(_MOCK_TITLES)],
                 "company": f"Client Company {i}",
                 "link": f"https://app.hubspot.com/contacts/contact/hs-contact-{i}"
             }
             for i in range(1, min(limit + 1, 6))
         ]
     
-    def _mock_notes(self, limit: int) -> List[Dict[str, Any]]:
+    def _mock_notes(self, limit: int) -> List[NoteRecord]:
         """Return mock notes."""
         return [
             {
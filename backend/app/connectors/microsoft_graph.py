@@ -4,9 +4,12 @@ Provides read-only access to Microsoft 365 data (Mail, Calendar, Teams).
 Implements minimalist fetching - only retrieves metadata and snippets.
 """
 import httpx
-from typing import Dict, Any, List, Optional
-from .base import BaseConnector
+import orjson
+from typing import Dict, Any, List, Optional, Tuple
+from .base import BaseConnector, ConnectorResult
+from .http import RetryTransport, SharedHTTPClient
 from ..core.logging import get_logger
+from ..core.cache import async_ttl_cache
 from ..core.exceptions import (
     MicrosoftGraphError,
     ConnectorAuthRequiredError,
@@ -14,9 +17,86 @@ from ..core.exceptions import (
     RateLimitError,
 )
 import asyncio
+import re
 
 logger = get_logger(__name__)
 
+# Microsoft Graph accepts at most 20 sub-requests per $batch call
+MAX_BATCH_REQUESTS = 20
+
+# Most recently active chats read by get_recent_chats
+MAX_RECENT_CHATS = 5
+
+# Query for the latest messages of a chat (get_recent_chats)
+CHAT_MESSAGE_PARAMS = {"$top": 3, "$orderby": "createdDateTime desc"}
+
+# Graph reads are cached per access token; calendars change slowest, mail is
+# re-read most often when a user opens an item.
+CALENDAR_CACHE_TTL_SECONDS = 15 * 60
+CHATS_CACHE_TTL_SECONDS = 5 * 60
+MESSAGE_CACHE_TTL_SECONDS = 2 * 60
+MAX_CACHED_READS = 256
+
+# Message properties search_emails reads from Search API hits; without "fields"
+# each hit carries the full message resource
+SEARCH_MESSAGE_FIELDS = ["id", "subject", "receivedDateTime", "bodyPreview", "from", "webLink"]
+
+# Strips HTML tags from Teams message bodies
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+# Throttled responses (429, and 503 which Graph also uses for throttling) are
+# retried after Retry-After, or jittered exponential backoff if none is sent
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+MAX_RETRY_BACKOFF_SECONDS = 10.0
+RETRY_STATUS_CODES = frozenset({429, 503})
+
+# Graph calls in flight at once across all connectors; HTTP/2 multiplexes them
+# over one connection, so the pool limits alone don't bound them
+MAX_CONCURRENT_REQUESTS = 10
+
+
+def _is_replay_safe(request: httpx.Request) -> bool:
+    """Everything but sendMail is a read (POSTs included: $batch, search)."""
+    return not request.url.path.endswith("/sendMail")
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Build the Microsoft Graph HTTP client (see _http)."""
+    return httpx.AsyncClient(
+        transport=RetryTransport(
+            httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+            ),
+            service_name="Microsoft Graph",
+            retry_status_codes=RETRY_STATUS_CODES,
+            max_retries=MAX_RETRIES,
+            backoff_seconds=RETRY_BACKOFF_SECONDS,
+            max_backoff_seconds=MAX_RETRY_BACKOFF_SECONDS,
+            semaphore=asyncio.Semaphore(MAX_CONCURRENT_REQUESTS),
+            is_replay_safe=_is_replay_safe
+        )
+    )
+
+
+_http = SharedHTTPClient(_create_http_client)
+_get_http_client = _http.get
+close_http_client = _http.aclose
+
+
+def _graph_read_cache(ttl_seconds: float, maxsize: int = MAX_CACHED_READS):
+    """Cache a connector loader's results per (access token, args) for ttl_seconds.
+    
+    Connectors are built per request, so the cache lives on the decorated
+    function (see async_ttl_cache).
+    """
+    return async_ttl_cache(
+        ttl_seconds,
+        maxsize,
+        key=lambda self, *args, **kwargs: (self.access_token, args, tuple(sorted(kwargs.items())))
+    )
+
 
 class MicrosoftGraphConnector(BaseConnector):
     """
@@ -32,6 +112,35 @@ class MicrosoftGraphConnector(BaseConnector):
     """
     name = "microsoft_graph"
     
+    # Fixed mock results returned without a token, built once and sliced per call
+    _MOCK_CALENDAR_EVENTS = tuple(
+        {
+            "id": f"event-{i}",
+            "source": "microsoft_graph",
+            "subject": f"Meeting #{i}",
+            "timestamp": f"2025-12-{10+i}T09:00:00Z",
+            "end_time": f"2025-12-{10+i}T10:00:00Z",
+            "location": "Conference Room A",
+            "snippet": "Discuss project updates",
+            "attendees": ["attendee@example.com"],
+            "link": f"https://outlook.office.com/calendar/item/event-{i}"
+        }
+        for i in range(1, 6)
+    )
+    _MOCK_CHAT_MESSAGES = tuple(
+        {
+            "id": f"chat-msg-{i}",
+            "chat_id": f"chat-{i}",
+            "source": "microsoft_graph",
+            "subject": "Teams Chat",
+            "timestamp": "2025-11-29T08:30:00Z",
+            "snippet": f"Hey, checking in about the project...",
+            "from": "Colleague Name",
+            "link": f"https://teams.microsoft.com/l/message/chat-{i}/msg-{i}"
+        }
+        for i in range(1, 4)
+    )
+    
     def __init__(self, settings: Dict[str, Any]):
         super().__init__(settings)
         self.api_base = "https://graph.microsoft.com/v1.0"
@@ -60,7 +169,113 @@ class MicrosoftGraphConnector(BaseConnector):
         """Build Teams deep link for a chat message."""
         return f"https://teams.microsoft.com/l/message/{chat_id}/{message_id}"
 
-    async def fetch_snippets(self, *, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def _snippet_params(self, query: str, limit: int) -> Dict[str, Any]:
+        """Build the /me/messages query parameters for a snippet search."""
+        # Use $search for keyword search or $filter for specific queries
+        params = {
+            "$select": "id,subject,receivedDateTime,bodyPreview,from,webLink",
+            "$top": limit,
+            "$orderby": "receivedDateTime desc",
+        }
+        
+        # If query looks like an email or name, search in from/to
+        if "@" in query or " " in query:
+            params["$search"] = f'"{query}"'
+        else:
+            params["$filter"] = f"contains(subject, '{query}') or contains(bodyPreview, '{query}')"
+        return params
+    
+    def _shape_snippets(self, data: Dict[str, Any], limit: int) -> List[ConnectorResult]:
+        """Convert a /me/messages response body into snippet dicts."""
+        results = []
+        for msg in data.get("value", []):
+            results.append({
+                "id": msg["id"],
+                "source": self.name,
+                "subject": msg.get("subject", "(No subject)"),
+                "timestamp": msg.get("receivedDateTime", ""),
+                "snippet": (msg.get("bodyPreview", "")[:200] + "...") if msg.get("bodyPreview") else "",
+                "from": msg.get("from", {}).get("emailAddress", {}).get("address", ""),
+                "link": msg.get("webLink") or self._build_email_deep_link(msg["id"])
+            })
+        return results
+
+    def _calendar_params(self, days_ahead: int, limit: int) -> Dict[str, Any]:
+        """Build the /me/calendarView query parameters for upcoming events."""
+        from datetime import datetime, timedelta
+        
+        start_time = datetime.utcnow().isoformat() + "Z"
+        end_time = (datetime.utcnow() + timedelta(days=days_ahead)).isoformat() + "Z"
+        
+        return {
+            "startDateTime": start_time,
+            "endDateTime": end_time,
+            "$select": "id,subject,start,end,location,bodyPreview,webLink,attendees",
+            "$top": limit,
+            "$orderby": "start/dateTime"
+        }
+    
+    def _shape_events(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Convert a /me/calendarView response body into event dicts."""
+        results = []
+        for event in data.get("value", []):
+            attendee_emails = [
+                a.get("emailAddress", {}).get("address", "")
+                for a in event.get("attendees", [])
+            ]
+            
+            results.append({
+                "id": event["id"],
+                "source": self.name,
+                "subject": event.get("subject", "(No subject)"),
+                "timestamp": event.get("start", {}).get("dateTime", ""),
+                "end_time": event.get("end", {}).get("dateTime", ""),
+                "location": event.get("location", {}).get("displayName", ""),
+                "snippet": event.get("bodyPreview", "")[:200],
+                "attendees": attendee_emails,
+                "link": event.get("webLink") or self._build_event_deep_link(event["id"])
+            })
+        return results
+    
+    def _chat_list_params(self, limit: int) -> Dict[str, Any]:
+        """Build the /me/chats query parameters for the most recently active chats."""
+        return {
+            "$top": min(limit, MAX_RECENT_CHATS),
+            "$orderby": "lastMessagePreview/createdDateTime desc"
+        }
+    
+    def _shape_chat_messages(
+        self,
+        chat_ids: List[str],
+        chat_messages: Dict[str, List[Dict[str, Any]]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Convert per-chat message lists into at most limit chat snippet dicts."""
+        results = []
+        for chat_id in chat_ids:
+            for msg in chat_messages.get(chat_id, []):
+                content = msg.get("body", {}).get("content", "")
+                # Strip HTML if present
+                if "<" in content:
+                    content = _HTML_TAG_RE.sub("", content)
+                
+                results.append({
+                    "id": msg["id"],
+                    "chat_id": chat_id,
+                    "source": self.name,
+                    "subject": f"Teams Chat",
+                    "timestamp": msg.get("createdDateTime", ""),
+                    "snippet": content[:200],
+                    "from": msg.get("from", {}).get("user", {}).get("displayName", "Unknown"),
+                    "link": self._build_chat_deep_link(chat_id, msg["id"])
+                })
+            
+            if len(results) >= limit:
+                break
+        
+        return results[:limit]
+
+    async def fetch_snippets(self, *, query: str, limit: int = 5) -> List[ConnectorResult]:
         """
         Search emails matching query and return metadata snippets.
         
@@ -75,56 +290,36 @@ class MicrosoftGraphConnector(BaseConnector):
             return self._mock_email_snippets(query, limit)
         
         try:
-            # Use $search for keyword search or $filter for specific queries
-            params = {
-                "$select": "id,subject,receivedDateTime,bodyPreview,from,webLink",
-                "$top": limit,
-                "$orderby": "receivedDateTime desc",
-            }
+            params = self._snippet_params(query, limit)
             
-            # If query looks like an email or name, search in from/to
-            if "@" in query or " " in query:
-                params["$search"] = f'"{query}"'
-            else:
-                params["$filter"] = f"contains(subject, '{query}') or contains(bodyPreview, '{query}')"
+            client = _get_http_client()
+            response = await client.get(
+                f"{self.api_base}/me/messages",
+                headers=self._get_headers(),
+                params=params,
+                timeout=self.timeout
+            )
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.api_base}/me/messages",
-                    headers=self._get_headers(),
-                    params=params
+            if response.status_code == 401:
+                logger.warning("Access token expired or invalid")
+                raise ConnectorAuthRequiredError(
+                    "Microsoft Graph access token expired or invalid",
+                    context={"status_code": 401}
                 )
-                
-                if response.status_code == 401:
-                    logger.warning("Access token expired or invalid")
-                    raise ConnectorAuthRequiredError(
-                        "Microsoft Graph access token expired or invalid",
-                        context={"status_code": 401}
-                    )
-                
-                if response.status_code == 429:
-                    retry_after = response.headers.get("Retry-After", "60")
-                    logger.warning(f"Rate limited by Microsoft Graph, retry after {retry_after}s")
-                    raise RateLimitError(
-                        "Microsoft Graph rate limit exceeded",
-                        service_name="microsoft_graph",
-                        retry_after=int(retry_after)
-                    )
-                
-                response.raise_for_status()
-                data = response.json()
             
-            results = []
-            for msg in data.get("value", [])[:limit]:
-                results.append({
-                    "id": msg["id"],
-                    "source": self.name,
-                    "subject": msg.get("subject", "(No subject)"),
-                    "timestamp": msg.get("receivedDateTime", ""),
-                    "snippet": (msg.get("bodyPreview", "")[:200] + "...") if msg.get("bodyPreview") else "",
-                    "from": msg.get("from", {}).get("emailAddress", {}).get("address", ""),
-                    "link": msg.get("webLink") or self._build_email_deep_link(msg["id"])
-                })
+            if response.status_code == 429:
+                retry_after = response.headers.get("Retry-After", "60")
+                logger.warning(f"Rate limited by Microsoft Graph, retry after {retry_after}s")
+                raise RateLimitError(
+                    "Microsoft Graph rate limit exceeded",
+                    service_name="microsoft_graph",
+                    retry_after=int(retry_after)
+                )
+            
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            
+            results = self._shape_snippets(data, limit)
             
             logger.debug(f"Fetched {len(results)} email snippets")
             return results
@@ -140,6 +335,217 @@ class MicrosoftGraphConnector(BaseConnector):
             # On error, return empty - don't fail the whole request
             return []
     
+    async def fetch_snippets_batch(self, queries: List[Tuple[str, int]]) -> List[List[ConnectorResult]]:
+        """
+        Run several snippet searches through the Graph JSON $batch endpoint.
+        
+        Up to MAX_BATCH_REQUESTS searches share one POST; results are returned
+        in query order. A failed sub-request yields an empty list, matching
+        fetch_snippets.
+        """
+        if not queries:
+            return []
+        
+        if not self.access_token or len(queries) == 1:
+            return [await self.fetch_snippets(query=query, limit=limit) for query, limit in queries]
+        
+        groups = [queries[i:i + MAX_BATCH_REQUESTS] for i in range(0, len(queries), MAX_BATCH_REQUESTS)]
+        grouped = await asyncio.gather(*(self._post_snippet_batch(group) for group in groups))
+        return [results for group_results in grouped for results in group_results]
+    
+    async def _post_snippet_batch(self, queries: List[Tuple[str, int]]) -> List[List[ConnectorResult]]:
+        """POST one $batch request and demultiplex the responses by id."""
+        logger.debug(f"Fetching email snippets for {len(queries)} queries via $batch")
+        
+        body = {
+            "requests": [
+                {
+                    "id": str(i),
+                    "method": "GET",
+                    "url": f"/me/messages?{httpx.QueryParams(self._snippet_params(query, limit))}"
+                }
+                for i, (query, limit) in enumerate(queries)
+            ]
+        }
+        
+        try:
+            client = _get_http_client()
+            response = await client.post(
+                f"{self.api_base}/$batch",
+                headers=self._get_headers(),
+                content=orjson.dumps(body),
+                timeout=self.timeout
+            )
+            
+            if response.status_code == 401:
+                logger.warning("Access token expired or invalid")
+                raise ConnectorAuthRequiredError(
+                    "Microsoft Graph access token expired or invalid",
+                    context={"status_code": 401}
+                )
+            
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            
+        except httpx.TimeoutException:
+            logger.error("Microsoft Graph batch request timed out")
+            raise ServiceTimeoutError(
+                "Microsoft Graph request timed out",
+                service_name="microsoft_graph"
+            )
+        except httpx.HTTPError as e:
+            logger.error(f"Microsoft Graph HTTP error: {e}")
+            # On error, return empty - don't fail the whole request
+            return [[] for _ in queries]
+        
+        responses = {r.get("id"): r for r in data.get("responses", [])}
+        results = []
+        for i, (query, limit) in enumerate(queries):
+            sub = responses.get(str(i), {})
+            status = sub.get("status", 0)
+            
+            if status == 401:
+                raise ConnectorAuthRequiredError(
+                    "Microsoft Graph access token expired or invalid",
+                    context={"status_code": 401}
+                )
+            if status == 429:
+                retry_after = sub.get("headers", {}).get("Retry-After", "60")
+                logger.warning(f"Rate limited by Microsoft Graph, retry after {retry_after}s")
+                raise RateLimitError(
+                    "Microsoft Graph rate limit exceeded",
+                    service_name="microsoft_graph",
+                    retry_after=int(retry_after)
+                )
+            if not 200 <= status < 300:
+                logger.error(f"Microsoft Graph batch sub-request failed with status {status}")
+                results.append([])
+                continue
+            
+            results.append(self._shape_snippets(sub.get("body") or {}, limit))
+        
+        logger.debug(f"Fetched email snippets for {len(results)} queries via $batch")
+        return results
+    
+    async def fetch_homepage(
+        self,
+        query: str,
+        limit: int = 5,
+        days_ahead: int = 30
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch email snippets, upcoming events and recent chats together.
+        
+        The mail search, calendar view and chat list share one $batch POST;
+        the chats' latest messages need the chat ids, so they follow in a
+        second (batched) call. Failed sub-requests yield empty lists, as the
+        individual methods do.
+        
+        Returns:
+            Dict with "emails", "meetings" and "chats" lists
+        """
+        if not self.access_token:
+            return {
+                "emails": self._mock_email_snippets(query, limit),
+                "meetings": self._mock_calendar_events(limit),
+                "chats": self._mock_chat_messages(limit),
+            }
+        
+        body = {
+            "requests": [
+                {
+                    "id": "mail",
+                    "method": "GET",
+                    "url": f"/me/messages?{httpx.QueryParams(self._snippet_params(query, limit))}"
+                },
+                {
+                    "id": "calendar",
+                    "method": "GET",
+                    "url": f"/me/calendarView?{httpx.QueryParams(self._calendar_params(days_ahead, limit))}"
+                },
+                {
+                    "id": "chats",
+                    "method": "GET",
+                    "url": f"/me/chats?{httpx.QueryParams(self._chat_list_params(limit))}"
+                },
+            ]
+        }
+        
+        try:
+            client = _get_http_client()
+            response = await client.post(
+                f"{self.api_base}/$batch",
+                headers=self._get_headers(),
+                content=orjson.dumps(body),
+                timeout=self.timeout
+            )
+        except httpx.TimeoutException:
+            logger.error("Microsoft Graph batch request timed out")
+            raise ServiceTimeoutError(
+                "Microsoft Graph request timed out",
+                service_name="microsoft_graph"
+            )
+        except httpx.HTTPError as e:
+            logger.error(f"Microsoft Graph HTTP error: {e}")
+            # On error, return empty - don't fail the whole request
+            return {"emails": [], "meetings": [], "chats": []}
+        
+        if response.status_code == 401:
+            logger.warning("Access token expired or invalid")
+            raise ConnectorAuthRequiredError(
+                "Microsoft Graph access token expired or invalid",
+                context={"status_code": 401}
+            )
+        
+        if response.is_error:
+            # $batch rejected outright: fall back to the individual reads
+            logger.warning(f"Microsoft Graph homepage $batch failed with status {response.status_code}, fetching separately")
+            emails, meetings, chats = await asyncio.gather(
+                self.fetch_snippets(query=query, limit=limit),
+                self.get_calendar_events(days_ahead, limit),
+                self.get_recent_chats(limit)
+            )
+            return {"emails": emails, "meetings": meetings, "chats": chats}
+        
+        responses = {r.get("id"): r for r in orjson.loads(response.content).get("responses", [])}
+        bodies = {}
+        for request_id in ("mail", "calendar", "chats"):
+            sub = responses.get(request_id, {})
+            status = sub.get("status", 0)
+            
+            if status == 401:
+                raise ConnectorAuthRequiredError(
+                    "Microsoft Graph access token expired or invalid",
+                    context={"status_code": 401}
+                )
+            if status == 429:
+                retry_after = sub.get("headers", {}).get("Retry-After", "60")
+                logger.warning(f"Rate limited by Microsoft Graph, retry after {retry_after}s")
+                raise RateLimitError(
+                    "Microsoft Graph rate limit exceeded",
+                    service_name="microsoft_graph",
+                    retry_after=int(retry_after)
+                )
+            if not 200 <= status < 300:
+                logger.error(f"Microsoft Graph {request_id} sub-request failed with status {status}")
+                bodies[request_id] = {}
+                continue
+            
+            bodies[request_id] = sub.get("body") or {}
+        
+        chat_ids = [chat["id"] for chat in bodies["chats"].get("value", [])]
+        try:
+            chat_messages = await self._fetch_chat_messages(chat_ids)
+        except httpx.HTTPError as e:
+            logger.error(f"Microsoft Graph HTTP error: {e}")
+            chat_messages = {}
+        
+        return {
+            "emails": self._shape_snippets(bodies["mail"], limit),
+            "meetings": self._shape_events(bodies["calendar"]),
+            "chats": self._shape_chat_messages(chat_ids, chat_messages, limit),
+        }
+    
     async def search_emails(
         self,
         query: str,
@@ -168,24 +574,26 @@ class MicrosoftGraphConnector(BaseConnector):
                     "queryString": query
                 },
                 "from": 0,
-                "size": limit
+                "size": limit,
+                "fields": SEARCH_MESSAGE_FIELDS
             }]
         }
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_base}/search/query",
-                    headers=self._get_headers(),
-                    json=search_request
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = _get_http_client()
+            response = await client.post(
+                f"{self.api_base}/search/query",
+                headers=self._get_headers(),
+                content=orjson.dumps(search_request),
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
             
             results = []
             hits = data.get("value", [{}])[0].get("hitsContainers", [{}])[0].get("hits", [])
             
-            for hit in hits[:limit]:
+            for hit in hits:
                 resource = hit.get("resource", {})
                 results.append({
                     "id": resource.get("id", ""),
@@ -220,53 +628,24 @@ class MicrosoftGraphConnector(BaseConnector):
         if not self.access_token:
             return self._mock_calendar_events(limit)
         
-        from datetime import datetime, timedelta
-        
-        start_time = datetime.utcnow().isoformat() + "Z"
-        end_time = (datetime.utcnow() + timedelta(days=days_ahead)).isoformat() + "Z"
-        
-        params = {
-            "startDateTime": start_time,
-            "endDateTime": end_time,
-            "$select": "id,subject,start,end,location,bodyPreview,webLink,attendees",
-            "$top": limit,
-            "$orderby": "start/dateTime"
-        }
-        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.api_base}/me/calendarView",
-                    headers=self._get_headers(),
-                    params=params
-                )
-                response.raise_for_status()
-                data = response.json()
-            
-            results = []
-            for event in data.get("value", [])[:limit]:
-                attendee_emails = [
-                    a.get("emailAddress", {}).get("address", "")
-                    for a in event.get("attendees", [])
-                ]
-                
-                results.append({
-                    "id": event["id"],
-                    "source": self.name,
-                    "subject": event.get("subject", "(No subject)"),
-                    "timestamp": event.get("start", {}).get("dateTime", ""),
-                    "end_time": event.get("end", {}).get("dateTime", ""),
-                    "location": event.get("location", {}).get("displayName", ""),
-                    "snippet": event.get("bodyPreview", "")[:200],
-                    "attendees": attendee_emails,
-                    "link": event.get("webLink") or self._build_event_deep_link(event["id"])
-                })
-            
-            return results
-            
+            return await self._load_calendar_events(days_ahead, limit)
         except httpx.HTTPError:
             return []
     
+    @_graph_read_cache(CALENDAR_CACHE_TTL_SECONDS)
+    async def _load_calendar_events(self, days_ahead: int, limit: int) -> List[Dict[str, Any]]:
+        """Fetch and shape upcoming calendar events (raises httpx.HTTPError)."""
+        client = _get_http_client()
+        response = await client.get(
+            f"{self.api_base}/me/calendarView",
+            headers=self._get_headers(),
+            params=self._calendar_params(days_ahead, limit),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return self._shape_events(orjson.loads(response.content))
+    
     async def get_recent_chats(
         self,
         limit: int = 10
@@ -283,56 +662,90 @@ class MicrosoftGraphConnector(BaseConnector):
             return self._mock_chat_messages(limit)
         
         try:
-            # First get chats
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.api_base}/me/chats",
-                    headers=self._get_headers(),
-                    params={"$top": 10}
-                )
-                response.raise_for_status()
-                chats_data = response.json()
-            
-            results = []
-            for chat in chats_data.get("value", [])[:5]:
-                chat_id = chat["id"]
-                
-                # Get recent messages from this chat
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    msg_response = await client.get(
-                        f"{self.api_base}/me/chats/{chat_id}/messages",
-                        headers=self._get_headers(),
-                        params={"$top": 3, "$orderby": "createdDateTime desc"}
-                    )
-                    
-                    if msg_response.status_code == 200:
-                        messages = msg_response.json().get("value", [])
-                        for msg in messages:
-                            content = msg.get("body", {}).get("content", "")
-                            # Strip HTML if present
-                            if "<" in content:
-                                import re
-                                content = re.sub('<[^<]+?>', '', content)
-                            
-                            results.append({
-                                "id": msg["id"],
-                                "chat_id": chat_id,
-                                "source": self.name,
-                                "subject": f"Teams Chat",
-                                "timestamp": msg.get("createdDateTime", ""),
-                                "snippet": content[:200],
-                                "from": msg.get("from", {}).get("user", {}).get("displayName", "Unknown"),
-                                "link": self._build_chat_deep_link(chat_id, msg["id"])
-                            })
-                
-                if len(results) >= limit:
-                    break
-            
-            return results[:limit]
-            
+            return await self._load_recent_chats(limit)
         except httpx.HTTPError:
             return []
     
+    @_graph_read_cache(CHATS_CACHE_TTL_SECONDS)
+    async def _load_recent_chats(self, limit: int) -> List[Dict[str, Any]]:
+        """Fetch and shape recent Teams chat messages (raises httpx.HTTPError)."""
+        # First get chats
+        client = _get_http_client()
+        response = await client.get(
+            f"{self.api_base}/me/chats",
+            headers=self._get_headers(),
+            params=self._chat_list_params(limit),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        chats_data = orjson.loads(response.content)
+        
+        chat_ids = [chat["id"] for chat in chats_data.get("value", [])]
+        
+        # Get recent messages from every chat in one $batch round trip
+        chat_messages = await self._fetch_chat_messages(chat_ids)
+        return self._shape_chat_messages(chat_ids, chat_messages, limit)
+    
+    async def _fetch_chat_messages(self, chat_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch the latest messages of each chat via one $batch call, keyed by chat id.
+        
+        Chats whose sub-request fails are left out, as the per-chat GETs skipped them.
+        """
+        if not chat_ids:
+            return {}
+        
+        params = httpx.QueryParams(CHAT_MESSAGE_PARAMS)
+        body = {
+            "requests": [
+                {
+                    "id": str(i),
+                    "method": "GET",
+                    "url": f"/me/chats/{chat_id}/messages?{params}"
+                }
+                for i, chat_id in enumerate(chat_ids[:MAX_BATCH_REQUESTS])
+            ]
+        }
+        
+        client = _get_http_client()
+        response = await client.post(
+            f"{self.api_base}/$batch",
+            headers=self._get_headers(),
+            content=orjson.dumps(body),
+            timeout=self.timeout
+        )
+        
+        if response.is_error:
+            # $batch rejected outright (e.g. blocked by policy): fetch per chat instead
+            logger.warning(f"Microsoft Graph chat $batch failed with status {response.status_code}, fetching per chat")
+            return await self._fetch_chat_messages_concurrently(chat_ids)
+        
+        responses = {r.get("id"): r for r in orjson.loads(response.content).get("responses", [])}
+        messages = {}
+        for i, chat_id in enumerate(chat_ids[:MAX_BATCH_REQUESTS]):
+            sub = responses.get(str(i), {})
+            if sub.get("status") == 200:
+                messages[chat_id] = (sub.get("body") or {}).get("value", [])
+        return messages
+    
+    async def _fetch_chat_messages_concurrently(self, chat_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Fallback for _fetch_chat_messages: one GET per chat, all in flight at once."""
+        client = _get_http_client()
+        responses = await asyncio.gather(*(
+            client.get(
+                f"{self.api_base}/me/chats/{chat_id}/messages",
+                headers=self._get_headers(),
+                params=CHAT_MESSAGE_PARAMS,
+                timeout=self.timeout
+            )
+            for chat_id in chat_ids
+        ))
+        
+        return {
+            chat_id: orjson.loads(response.content).get("value", [])
+            for chat_id, response in zip(chat_ids, responses)
+            if response.status_code == 200
+        }
+    
     async def get_record(self, record_id: str) -> Dict[str, Any]:
         """
         Get a specific email by ID.
@@ -343,30 +756,35 @@ class MicrosoftGraphConnector(BaseConnector):
             return self._mock_email_record(record_id)
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.api_base}/me/messages/{record_id}",
-                    headers=self._get_headers(),
-                    params={
-                        "$select": "id,subject,receivedDateTime,bodyPreview,from,webLink"
-                    }
-                )
-                response.raise_for_status()
-                msg = response.json()
-            
-            return {
-                "id": msg["id"],
-                "source": self.name,
-                "subject": msg.get("subject", "(No subject)"),
-                "timestamp": msg.get("receivedDateTime", ""),
-                "body_preview": msg.get("bodyPreview", ""),
-                "from": msg.get("from", {}).get("emailAddress", {}).get("address", ""),
-                "link": msg.get("webLink") or self._build_email_deep_link(msg["id"])
-            }
-            
+            return await self._load_message(record_id)
         except httpx.HTTPError:
             return self._mock_email_record(record_id)
     
+    @_graph_read_cache(MESSAGE_CACHE_TTL_SECONDS)
+    async def _load_message(self, record_id: str) -> Dict[str, Any]:
+        """Fetch and shape one email's minimal fields (raises httpx.HTTPError)."""
+        client = _get_http_client()
+        response = await client.get(
+            f"{self.api_base}/me/messages/{record_id}",
+            headers=self._get_headers(),
+            params={
+                "$select": "id,subject,receivedDateTime,bodyPreview,from,webLink"
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        msg = orjson.loads(response.content)
+        
+        return {
+            "id": msg["id"],
+            "source": self.name,
+            "subject": msg.get("subject", "(No subject)"),
+            "timestamp": msg.get("receivedDateTime", ""),
+            "body_preview": msg.get("bodyPreview", ""),
+            "from": msg.get("from", {}).get("emailAddress", {}).get("address", ""),
+            "link": msg.get("webLink") or self._build_email_deep_link(msg["id"])
+        }
+    
     async def send_email(
         self,
         to: List[str],
@@ -405,13 +823,14 @@ class MicrosoftGraphConnector(BaseConnector):
         }
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_base}/me/sendMail",
-                    headers=self._get_headers(),
-                    json=message
-                )
-                response.raise_for_status()
+            client = _get_http_client()
+            response = await client.post(
+                f"{self.api_base}/me/sendMail",
+                headers=self._get_headers(),
+                content=orjson.dumps(message),
+                timeout=self.timeout
+            )
+            response.raise_for_status()
             
             return {"status": "sent", "recipients": to, "subject": subject}
             
@@ -439,36 +858,12 @@ class MicrosoftGraphConnector(BaseConnector):
     
     def _mock_calendar_events(self, limit: int) -> List[Dict[str, Any]]:
         """Return mock calendar data for testing."""
-        return [
-            {
-                "id": f"event-{i}",
-                "source": self.name,
-                "subject": f"Meeting #{i}",
-                "timestamp": f"2025-12-{10+i}T09:00:00Z",
-                "end_time": f"2025-12-{10+i}T10:00:00Z",
-                "location": "Conference Room A",
-                "snippet": "Discuss project updates",
-                "attendees": ["attendee@example.com"],
-                "link": f"https://outlook.office.com/calendar/item/event-{i}"
-            }
-            for i in range(1, min(limit + 1, 6))
-        ]
+        # Shallow copies, so callers can annotate results without touching the originals
+        return [dict(event) for event in self._MOCK_CALENDAR_EVENTS[:max(limit, 0)]]
     
     def _mock_chat_messages(self, limit: int) -> List[Dict[str, Any]]:
         """Return mock Teams chat data for testing."""
-        return [
-            {
-                "id": f"chat-msg-{i}",
-                "chat_id": f"chat-{i}",
-                "source": self.name,
-                "subject": "Teams Chat",
-                "timestamp": "2025-11-29T08:30:00Z",
-                "snippet": f"Hey, checking in about the project...",
-                "from": "Colleague Name",
-                "link": f"https://teams.microsoft.com/l/message/chat-{i}/msg-{i}"
-            }
-            for i in range(1, min(limit + 1, 4))
-        ]
+        return [dict(msg) for msg in self._MOCK_CHAT_MESSAGES[:max(limit, 0)]]
     
     def _mock_email_record(self, record_id: str) -> Dict[str, Any]:
         """Return mock email record for testing."""
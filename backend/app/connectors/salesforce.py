@@ -5,7 +5,7 @@ Provides read-only access to Salesforce data for policy and client information.
 import os
 import httpx
 from typing import Dict, Any, List, Optional
-from .base import BaseConnector
+from .base import BaseConnector, ConnectorResult
 from ..core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -73,7 +73,7 @@ class SalesforceConnector(BaseConnector):
             return f"{self.instance_url}/{record_id}"
         return f"https://login.salesforce.com/{record_id}"
     
-    async def fetch_snippets(self, *, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    async def fetch_snippets(self, *, query: str, limit: int = 5) -> List[ConnectorResult]:
         """
         Search across Salesforce objects for matching records.
         Uses SOSL (Salesforce Object Search Language) for full-text search.
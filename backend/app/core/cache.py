@@ -0,0 +1,114 @@
+"""
+Async caching helpers for Broker Copilot
+
+TTL/LRU result caches and single-flight call coalescing shared by the
+connectors, OAuth clients, chat tools and brief generation.
+"""
+
+import asyncio
+import copy
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Returned by TTLCache.get on a miss, so None can be cached like any other value
+MISSING = object()
+
+
+class TTLCache:
+    """LRU-bounded mapping whose entries expire ttl_seconds after they are stored."""
+    
+    def __init__(self, ttl_seconds: float, maxsize: int):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+    
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Return the fresh value for key, or default if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        stored_at, value = entry
+        if time.monotonic() - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value for key, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one shared task.
+    
+    The call runs in its own task and every caller awaits it through
+    asyncio.shield, so cancelling one caller (e.g. a client disconnect) neither
+    cancels the shared call nor fails the other callers.
+    """
+    
+    def __init__(self):
+        self._tasks: Dict[Hashable, "asyncio.Task[Any]"] = {}
+    
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Await call() for key, joining a call already in flight for the same key."""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._tasks[key] = task
+            task.add_done_callback(functools.partial(self._forget, key))
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        """Drop a finished task from the registry."""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved in case every caller was cancelled
+
+
+def async_ttl_cache(
+    ttl_seconds: float,
+    maxsize: int,
+    key: Optional[Callable[..., Hashable]] = None
+):
+    """Cache an async function's results for ttl_seconds (LRU-bounded).
+    
+    key builds the cache key from the call arguments (default: the arguments
+    themselves). Concurrent misses for the same key share one call, failures
+    are never cached, and every caller gets a deep copy of the cached value.
+    """
+    def decorator(func):
+        cache = TTLCache(ttl_seconds, maxsize)
+        flights = SingleFlight()
+        
+        async def load(cache_key: Hashable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+            result = await func(*args, **kwargs)
+            cache.set(cache_key, result)
+            return result
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            result = cache.get(cache_key)
+            if result is MISSING:
+                result = await flights.run(cache_key, lambda: load(cache_key, args, kwargs))
+            return copy.deepcopy(result)
+        
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
@@ -3,12 +3,14 @@ Gemini 3.0 Integration Module
 Handles streaming responses and function-calling for Broker Copilot.
 """
 import os
-import json
+import time
 import asyncio
 import httpx
-from typing import Dict, Any, List, AsyncGenerator, Optional, Callable
+import orjson
+from typing import Dict, Any, List, AsyncGenerator, Optional, Callable, Mapping, Tuple
 from dataclasses import dataclass, field
 
+from ..core.cache import SingleFlight
 from ..core.logging import get_logger
 from ..core.exceptions import (
     LLMError,
@@ -24,6 +26,14 @@ logger = get_logger(__name__)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
 GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}"
+GEMINI_CACHE_URL = "https://generativelanguage.googleapis.com/v1beta/cachedContents"
+
+# Server-side prefix caches live this long; they are recreated shortly before expiry
+PREFIX_CACHE_TTL_SECONDS = 3600
+PREFIX_CACHE_REFRESH_MARGIN = 60
+# Requests wait at most this long for a prefix cache being created, then send the
+# full prefix; the create keeps running and later requests pick up its result
+PREFIX_CACHE_WAIT_SECONDS = 2.0
 
 
 @dataclass
@@ -43,6 +53,16 @@ class GeminiConfig:
     top_k: int = 40
     system_instruction: str = ""
     functions: List[FunctionDeclaration] = field(default_factory=list)
+    # Send the system instruction and tools once as a cachedContents entry and
+    # reference it from each request instead of resending the prefix
+    cache_prefix: bool = False
+
+
+async def _call_handler(handler: Callable, args: Dict[str, Any]) -> Any:
+    """Invoke a function handler, awaiting it if it is a coroutine function."""
+    if asyncio.iscoroutinefunction(handler):
+        return await handler(**args)
+    return handler(**args)
 
 
 class GeminiClient:
@@ -51,6 +71,11 @@ class GeminiClient:
     def __init__(self, api_key: str = None):
         self.api_key = api_key or GEMINI_API_KEY
         self.base_url = GEMINI_API_URL
+        
+        # (system_instruction, function names) -> (cachedContents name or None, refresh deadline)
+        self._prefix_caches: Dict[Tuple[str, Tuple[str, ...]], Tuple[Optional[str], float]] = {}
+        # Prefix cache creations in flight, keyed like _prefix_caches
+        self._prefix_cache_creates = SingleFlight()
 
     def _build_headers(self) -> Dict[str, str]:
         return {
@@ -68,12 +93,92 @@ class GeminiClient:
             for f in functions
         ]
 
+    def _build_prefix(self, config: GeminiConfig) -> Dict[str, Any]:
+        """Build the systemInstruction/tools fields shared by every request with this config."""
+        prefix = {}
+
+        if config.system_instruction:
+            prefix["systemInstruction"] = {
+                "parts": [{"text": config.system_instruction}]
+            }
+
+        if config.functions:
+            prefix["tools"] = [{
+                "functionDeclarations": self._build_function_declarations(config.functions)
+            }]
+
+        return prefix
+
+    async def cache_prefix(self, config: GeminiConfig) -> Optional[str]:
+        """
+        Get the cachedContents name holding config's system instruction and tools,
+        creating it on first use. Returns None if the prefix can't be cached
+        (e.g. it is below the model's minimum cacheable size); that result is
+        remembered for PREFIX_CACHE_TTL_SECONDS so callers don't retry per request.
+        
+        Concurrent requests share one create, and none waits for it longer than
+        PREFIX_CACHE_WAIT_SECONDS (they send the full prefix instead).
+        """
+        key = (config.system_instruction, tuple(f.name for f in config.functions))
+        entry = self._prefix_caches.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+
+        try:
+            return await asyncio.wait_for(
+                self._prefix_cache_creates.run(key, lambda: self._store_prefix_cache(key, config)),
+                timeout=PREFIX_CACHE_WAIT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.debug("Gemini prefix cache still being created, sending the full prefix")
+            return None
+
+    async def _store_prefix_cache(self, key: Tuple[str, Tuple[str, ...]], config: GeminiConfig) -> Optional[str]:
+        """Create config's prefix cache and remember the outcome under key."""
+        name = await self._create_cached_content(config)
+        self._prefix_caches[key] = (
+            name,
+            time.monotonic() + PREFIX_CACHE_TTL_SECONDS - PREFIX_CACHE_REFRESH_MARGIN
+        )
+        return name
+
+    async def _create_cached_content(self, config: GeminiConfig) -> Optional[str]:
+        """Create a cachedContents entry for config's prefix; None if Gemini refuses it."""
+        body = {
+            "model": f"models/{GEMINI_MODEL}",
+            "ttl": f"{PREFIX_CACHE_TTL_SECONDS}s",
+            **self._build_prefix(config),
+        }
+        url = f"{GEMINI_CACHE_URL}?key={self.api_key}"
+
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.post(url, content=orjson.dumps(body), headers=self._build_headers())
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not create Gemini prefix cache: {e}")
+            return None
+
+        if response.status_code != 200:
+            logger.info(
+                "Gemini prefix cache not created, sending the full prefix",
+                extra={"status_code": response.status_code}
+            )
+            return None
+
+        name = orjson.loads(response.content).get("name")
+        logger.debug(f"Created Gemini prefix cache {name}")
+        return name
+
     def _build_request_body(
         self,
         messages: List[Dict[str, Any]],
-        config: GeminiConfig
+        config: GeminiConfig,
+        cached_content: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Build the request body for Gemini API."""
+        """Build the request body for Gemini API.
+        
+        With cached_content, the system instruction and tools come from the cache.
+        """
         body = {
             "contents": messages,
             "generationConfig": {
@@ -84,15 +189,10 @@ class GeminiClient:
             }
         }
 
-        if config.system_instruction:
-            body["systemInstruction"] = {
-                "parts": [{"text": config.system_instruction}]
-            }
-
-        if config.functions:
-            body["tools"] = [{
-                "functionDeclarations": self._build_function_declarations(config.functions)
-            }]
+        if cached_content:
+            body["cachedContent"] = cached_content
+        else:
+            body.update(self._build_prefix(config))
 
         return body
 
@@ -107,14 +207,15 @@ class GeminiClient:
             raise ConfigurationError("GEMINI_API_KEY not configured")
         
         config = config or GeminiConfig()
-        body = self._build_request_body(messages, config)
+        cached_content = await self.cache_prefix(config) if config.cache_prefix else None
+        body = self._build_request_body(messages, config, cached_content)
         url = f"{self.base_url}:generateContent?key={self.api_key}"
 
         logger.debug(f"Sending request to Gemini (model: {GEMINI_MODEL})")
         
         try:
             async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(url, json=body, headers=self._build_headers())
+                response = await client.post(url, content=orjson.dumps(body), headers=self._build_headers())
                 
                 if response.status_code == 429:
                     logger.warning("Gemini rate limit exceeded")
@@ -124,7 +225,7 @@ class GeminiClient:
                     )
                 
                 if response.status_code == 400:
-                    error_data = response.json()
+                    error_data = orjson.loads(response.content)
                     error_msg = error_data.get("error", {}).get("message", "Bad request")
                     if "safety" in error_msg.lower() or "block" in error_msg.lower():
                         logger.warning(f"Content filtered by Gemini: {error_msg}")
@@ -138,7 +239,7 @@ class GeminiClient:
                     )
                 
                 response.raise_for_status()
-                result = response.json()
+                result = orjson.loads(response.content)
                 logger.debug("Gemini response received successfully")
                 return result
                 
@@ -155,19 +256,33 @@ class GeminiClient:
         config: GeminiConfig = None
     ) -> AsyncGenerator[str, None]:
         """Generate a streaming response from Gemini, yielding text chunks."""
+        async for part in self.generate_stream_parts(messages, config):
+            if "text" in part:
+                yield part["text"]
+
+    async def generate_stream_parts(
+        self,
+        messages: List[Dict[str, Any]],
+        config: GeminiConfig = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Generate a streaming response from Gemini, yielding raw content parts.
+        
+        Unlike generate_stream, functionCall parts are passed through as they arrive.
+        """
         if not self.api_key:
             logger.error("Gemini API key not configured")
             raise ConfigurationError("GEMINI_API_KEY not configured")
         
         config = config or GeminiConfig()
-        body = self._build_request_body(messages, config)
+        cached_content = await self.cache_prefix(config) if config.cache_prefix else None
+        body = self._build_request_body(messages, config, cached_content)
         url = f"{self.base_url}:streamGenerateContent?alt=sse&key={self.api_key}"
 
         logger.debug(f"Starting streaming request to Gemini")
         
         try:
             async with httpx.AsyncClient(timeout=120.0) as client:
-                async with client.stream("POST", url, json=body, headers=self._build_headers()) as response:
+                async with client.stream("POST", url, content=orjson.dumps(body), headers=self._build_headers()) as response:
                     if response.status_code == 429:
                         raise LLMRateLimitError("Gemini rate limit exceeded", service_name="gemini")
                     response.raise_for_status()
@@ -175,25 +290,30 @@ class GeminiClient:
                         if line.startswith("data: "):
                             data = line[6:]
                             if data.strip() == "[DONE]":
-                            break
-                        try:
-                            chunk = json.loads(data)
-                            # Extract text from the response
-                            candidates = chunk.get("candidates", [])
-                            if candidates:
-                                content = candidates[0].get("content", {})
-                                parts = content.get("parts", [])
-                                for part in parts:
-                                    if "text" in part:
-                                        yield part["text"]
-                        except json.JSONDecodeError:
-                            continue
+                                break
+                            try:
+                                chunk = orjson.loads(data)
+                                # Extract content parts from the response
+                                candidates = chunk.get("candidates", [])
+                                if candidates:
+                                    content = candidates[0].get("content", {})
+                                    for part in content.get("parts", []):
+                                        yield part
+                            except orjson.JSONDecodeError:
+                                continue
+                                
+        except httpx.TimeoutException:
+            logger.error("Gemini streaming request timed out")
+            raise LLMError("Gemini streaming request timed out", context={"timeout": 120})
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error streaming from Gemini: {e}")
+            raise LLMAPIError(f"HTTP error: {str(e)}", cause=e)
 
     async def generate_with_functions(
         self,
         messages: List[Dict[str, Any]],
         config: GeminiConfig,
-        function_handlers: Dict[str, Callable]
+        function_handlers: Mapping[str, Callable]
     ) -> Dict[str, Any]:
         """
         Generate a response with function-calling support.
@@ -226,64 +346,63 @@ class GeminiClient:
                     "raw_response": result
                 }
 
-            # Execute function calls
+            # Execute known function calls concurrently; results keep the call order
+            known_calls = [
+                fc_part for fc_part in function_calls
+                if fc_part["functionCall"]["name"] in function_handlers
+            ]
+            outcomes = await asyncio.gather(
+                *(
+                    _call_handler(
+                        function_handlers[fc_part["functionCall"]["name"]],
+                        fc_part["functionCall"].get("args", {})
+                    )
+                    for fc_part in known_calls
+                ),
+                return_exceptions=True
+            )
+            outcome_iter = iter(outcomes)
+
             for fc_part in function_calls:
                 fc = fc_part["functionCall"]
                 func_name = fc["name"]
                 func_args = fc.get("args", {})
 
                 if func_name in function_handlers:
-                    try:
-                        # Execute the function
-                        handler = function_handlers[func_name]
-                        if asyncio.iscoroutinefunction(handler):
-                            func_result = await handler(**func_args)
-                        else:
-                            func_result = handler(**func_args)
-
+                    func_result = next(outcome_iter)
+                    if isinstance(func_result, Exception):
                         function_results.append({
                             "function": func_name,
                             "args": func_args,
-                            "result": func_result
-                        })
-
-                        # Add the model's response to conversation
-                        conversation.append({
-                            "role": "model",
-                            "parts": [fc_part]
-                        })
-
-                        # Add function response to conversation
-                        conversation.append({
-                            "role": "function",
-                            "parts": [{
-                                "functionResponse": {
-                                    "name": func_name,
-                                    "response": {"result": func_result}
-                                }
-                            }]
+                            "error": str(func_result)
                         })
-
-                    except Exception as e:
+                        response = {"error": str(func_result)}
+                    elif isinstance(func_result, BaseException):
+                        raise func_result
+                    else:
                         function_results.append({
                             "function": func_name,
                             "args": func_args,
-                            "error": str(e)
-                        })
-                        # Add error response
-                        conversation.append({
-                            "role": "model",
-                            "parts": [fc_part]
-                        })
-                        conversation.append({
-                            "role": "function",
-                            "parts": [{
-                                "functionResponse": {
-                                    "name": func_name,
-                                    "response": {"error": str(e)}
-                                }
-                            }]
+                            "result": func_result
                         })
+                        response = {"result": func_result}
+
+                    # Add the model's response to conversation
+                    conversation.append({
+                        "role": "model",
+                        "parts": [fc_part]
+                    })
+
+                    # Add function response to conversation
+                    conversation.append({
+                        "role": "function",
+                        "parts": [{
+                            "functionResponse": {
+                                "name": func_name,
+                                "response": response
+                            }
+                        }]
+                    })
                 else:
                     # Unknown function
                     conversation.append({
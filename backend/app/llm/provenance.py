@@ -3,13 +3,16 @@ Provenance Injection Module
 Handles citation parsing and deep-link injection for LLM outputs.
 """
 import re
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional, Iterable
 from dataclasses import dataclass
 
 from ..core.logging import get_logger
 
 logger = get_logger(__name__)
 
+CITATION_MARKER = "[SOURCE:"
+_CITATION_RE = re.compile(r'\[SOURCE:([^\]]+)\]')
+
 
 @dataclass
 class Citation:
@@ -63,10 +66,9 @@ def extract_citations(text: str) -> List[Citation]:
     Returns:
         List of Citation objects with positions.
     """
-    pattern = r'\[SOURCE:([^\]]+)\]'
     citations = []
     
-    for match in re.finditer(pattern, text):
+    for match in _CITATION_RE.finditer(text):
         citations.append(Citation(
             source_id=match.group(1),
             start_pos=match.start(),
@@ -130,6 +132,92 @@ def inject_links(text: str, provenance: Dict[str, str]) -> Tuple[str, List[Dict[
     return result, citation_info
 
 
+def inject_links_from_segments(
+    segments: Iterable[Tuple[str, Optional[str]]],
+    provenance: Dict[str, str]
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Build linked text from (text, source_id) segments without scanning for markers.
+    
+    Each segment's text is followed by a citation for source_id (if any), rendered
+    exactly as inject_links would render the equivalent [SOURCE:id] marker.
+    
+    Args:
+        segments: Pairs of literal text and the source it cites (None for no citation).
+        provenance: Mapping from source IDs to deep links.
+    
+    Returns:
+        Tuple of (text_with_links, list_of_citation_info)
+    """
+    parts = []
+    citation_info = []
+    
+    for text, source_id in segments:
+        parts.append(text)
+        if source_id is None:
+            continue
+        link = provenance.get(source_id, "")
+        if link:
+            parts.append(f"[📎]({link})")
+        else:
+            # Keep the marker but note it's unresolved
+            parts.append(f"{CITATION_MARKER}{source_id}]")
+        citation_info.append({
+            "source_id": source_id,
+            "link": link or None,
+            "resolved": bool(link)
+        })
+    
+    return "".join(parts), citation_info
+
+
+def _is_partial_marker(text: str) -> bool:
+    """Check whether text could be the start of a citation marker that hasn't closed yet."""
+    if "]" in text:
+        return False
+    if len(text) < len(CITATION_MARKER):
+        return CITATION_MARKER.startswith(text)
+    return text.startswith(CITATION_MARKER)
+
+
+class StreamingLinkInjector:
+    """
+    Inject citation links into streamed LLM output chunk by chunk.
+    
+    Markers split across chunk boundaries (e.g. "[SOU" + "RCE:id]") are held back
+    until they close, so each link is emitted as soon as its marker is complete.
+    """
+    # Give up on a marker that hasn't closed within this many characters
+    MAX_PENDING_CHARS = 256
+    
+    def __init__(self, provenance: Dict[str, str]):
+        self.provenance = provenance
+        self._tail = ""
+    
+    def _replace(self, match: re.Match) -> str:
+        link = self.provenance.get(match.group(1), "")
+        # Unresolved markers are kept as-is, matching inject_links
+        return f"[📎]({link})" if link else match.group(0)
+    
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the text that is safe to emit."""
+        text = self._tail + chunk
+        self._tail = ""
+        start = text.rfind("[")
+        if (
+            start != -1
+            and len(text) - start <= self.MAX_PENDING_CHARS
+            and _is_partial_marker(text[start:])
+        ):
+            text, self._tail = text[:start], text[start:]
+        return _CITATION_RE.sub(self._replace, text)
+    
+    def flush(self) -> str:
+        """Return any held-back text once the stream has ended."""
+        text, self._tail = self._tail, ""
+        return _CITATION_RE.sub(self._replace, text)
+
+
 def inject_links_html(text: str, provenance: Dict[str, str]) -> Tuple[str, List[Dict[str, Any]]]:
     """
     Replace citation markers with clickable HTML links.
@@ -23,12 +23,12 @@ from .core.exceptions import (
     NotFoundError,
 )
 from .core.middleware import RequestContextMiddleware
-from .connectors.microsoft_graph import MicrosoftGraphConnector
+from .connectors.microsoft_graph import MicrosoftGraphConnector, close_http_client as close_graph_http_client
 from .connectors.salesforce import SalesforceConnector
-from .connectors.hubspot import HubSpotConnector
+from .connectors.hubspot import HubSpotConnector, close_http_client as close_hubspot_http_client
 from .brief import generate_brief, stream_brief
 from .chat_agent import handle_chat_message, stream_chat_response
-from .priority import deterministic_score
+from .priority import deterministic_score, deterministic_score_batch
 from .templates import render_template
 from .pdf_generator import generate_brief_pdf, create_sample_brief_content
 from .auth.oauth import get_oauth_client, OAuthError, TokenInfo
@@ -165,6 +165,16 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
 # Include email scheduling router
 app.include_router(email_router)
 
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Close pooled HTTP clients held by the OAuth singletons and connectors."""
+    await get_oauth_client().close()
+    await get_hubspot_oauth_client().close()
+    await get_salesforce_oauth_client().close()
+    await close_hubspot_http_client()
+    await close_graph_http_client()
+
 logger.info("Broker Copilot backend initialized successfully")
 
 # In-memory ephemeral token store (per process only). Do NOT use in prod.
@@ -945,8 +955,11 @@ async def salesforce_oauth_logout(user_id: str):
     token_info = sf_oauth.get_user_token(user_id)
     
     if token_info:
-        await sf_oauth.revoke_token(token_info.access_token)
-        sf_oauth.remove_user_token(user_id)
+        # The local session ends even if Salesforce couldn't revoke the tokens
+        try:
+            await sf_oauth.revoke_all(token_info)
+        finally:
+            sf_oauth.remove_user_token(user_id)
     
     return {"status": "logged_out", "provider": "salesforce", "user_id": user_id}
 
@@ -1092,9 +1105,8 @@ async def get_crm_renewals(query: CRMQuery, days_window: int = 90):
     else:
         raise HTTPException(status_code=400, detail="Invalid CRM provider")
     
-    # Apply priority scoring to each renewal
-    for renewal in renewals:
-        score, breakdown = deterministic_score(renewal)
+    # Apply priority scoring to each renewal (scored in one batch)
+    for renewal, (score, breakdown) in zip(renewals, deterministic_score_batch(renewals)):
         renewal["score"] = score
         renewal["score_breakdown"] = breakdown
         
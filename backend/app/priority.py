@@ -7,7 +7,7 @@ Implements deterministic priority scoring for policy renewals based on:
 - Claims frequency (weighted 15%)
 """
 from math import exp
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, List, Iterable
 
 from .core.logging import get_logger
 
@@ -25,6 +25,34 @@ def time_decay_score(days_to_expiry: float) -> float:
     return 1 - exp(-k * max(0.0, 90 - min(days_to_expiry, 90)))
 
 
+# Component weights for the combined score
+W_PREMIUM = 0.5
+W_TIME = 0.35
+W_CLAIMS = 0.15
+
+
+def _score_components(premium: float, days: float, claims: float) -> Tuple[float, Dict[str, float]]:
+    """Combine normalized premium, time decay and claims into (score, breakdown)."""
+    # Normalize premium: assume 0-250k meaningful range
+    prem_norm = min(premium / 250000.0, 1.0)
+
+    # Normalize claims frequency: assume 0-10
+    claims_norm = min(claims / 10.0, 1.0)
+
+    decay = time_decay_score(days)
+
+    # Weighted combination
+    score = (W_PREMIUM * prem_norm) + (W_TIME * decay) + (W_CLAIMS * claims_norm)
+    score = max(0.0, min(1.0, score))
+
+    breakdown = {
+        "premium_component": W_PREMIUM * prem_norm,
+        "time_component": W_TIME * decay,
+        "claims_component": W_CLAIMS * claims_norm,
+    }
+    return score, breakdown
+
+
 def deterministic_score(policy: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
     """Compute a deterministic priority score in [0,1].
     Inputs expected in policy dict:
@@ -41,27 +69,7 @@ def deterministic_score(policy: Dict[str, Any]) -> Tuple[float, Dict[str, float]
     days = float(policy.get("days_to_expiry", 90.0))
     claims = float(policy.get("claims_frequency", 0.0))
 
-    # Normalize premium: assume 0-250k meaningful range
-    prem_norm = min(premium / 250000.0, 1.0)
-
-    # Normalize claims frequency: assume 0-10
-    claims_norm = min(claims / 10.0, 1.0)
-
-    decay = time_decay_score(days)
-
-    # Weighted combination
-    w_premium = 0.5
-    w_time = 0.35
-    w_claims = 0.15
-
-    score = (w_premium * prem_norm) + (w_time * decay) + (w_claims * claims_norm)
-    score = max(0.0, min(1.0, score))
-
-    breakdown = {
-        "premium_component": w_premium * prem_norm,
-        "time_component": w_time * decay,
-        "claims_component": w_claims * claims_norm,
-    }
+    score, breakdown = _score_components(premium, days, claims)
     
     logger.debug(
         f"Priority score calculated",
@@ -75,3 +83,19 @@ def deterministic_score(policy: Dict[str, Any]) -> Tuple[float, Dict[str, float]
     )
     
     return score, breakdown
+
+
+def deterministic_score_batch(policies: Iterable[Dict[str, Any]]) -> List[Tuple[float, Dict[str, float]]]:
+    """Score many policies at once, e.g. a renewal pipeline.
+    Same results as calling deterministic_score on each, without per-policy logging.
+    """
+    results = [
+        _score_components(
+            float(policy.get("premium_at_risk", 0.0)),
+            float(policy.get("days_to_expiry", 90.0)),
+            float(policy.get("claims_frequency", 0.0)),
+        )
+        for policy in policies
+    ]
+    logger.debug("Calculated priority scores for %d policies", len(results))
+    return results